@@ -1,7 +1,8 @@
-from fastapi import Depends
+from fastapi import Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.core.config import settings
+from app.db.session import get_db, get_read_db
 from app.security.auth import get_current_user, CurrentUser
 
 
@@ -9,7 +10,24 @@ async def get_db_session(db: AsyncSession = Depends(get_db)):
     return db
 
 
+async def get_read_db_session(db: AsyncSession = Depends(get_read_db)):
+    # solo para rutas que no escriben: puede ir a la réplica
+    return db
+
+
 async def get_authenticated_user(
     current_user: CurrentUser = Depends(get_current_user),
 ):
     return current_user
+
+
+async def get_tenant_id(
+    current_user: CurrentUser = Depends(get_authenticated_user),
+) -> int | None:
+    # None = sin acotar (solo con TENANT_REQUIRED=False)
+    if current_user.empresa_id is None and settings.TENANT_REQUIRED:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Usuario sin empresa asignada",
+        )
+    return current_user.empresa_id
@@ -0,0 +1,28 @@
+import hashlib
+from typing import Iterable
+
+from fastapi import Request, Response, status
+
+
+def make_etag(versions: Iterable[str]) -> str:
+    # ETag fuerte: mismo contenido => misma representación
+    digest = hashlib.md5("|".join(versions).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match usa comparación débil: se ignora el prefijo W/
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in tags
+
+
+def not_modified(etag: str, headers: dict[str, str] | None = None) -> Response:
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, **(headers or {})},
+    )
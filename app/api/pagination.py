@@ -0,0 +1,113 @@
+import base64
+import json
+import math
+from typing import Any, Callable, Sequence
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import BigInteger, Select, and_, or_
+from sqlalchemy.sql.elements import ColumnElement
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# (expresión, descendente)
+SortKey = tuple[ColumnElement, bool]
+
+
+def encode_cursor(sort: str, values: Sequence[Any]) -> str:
+    raw = json.dumps({"s": sort, "v": list(values)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _valid_value(column: ColumnElement, value: Any) -> bool:
+    # el cursor viene del cliente: un tipo que no coincide con la columna
+    # llegaría a asyncpg como bind inválido (DataError => 500)
+    if isinstance(value, bool):
+        return False
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return isinstance(value, (int, float, str))
+    if python_type is int:
+        bits = 64 if isinstance(column.type, BigInteger) else 32
+        return isinstance(value, int) and -(2 ** (bits - 1)) <= value < 2 ** (bits - 1)
+    if python_type is float:
+        return isinstance(value, (int, float)) and math.isfinite(value)
+    if python_type is str:
+        return isinstance(value, str)
+    return isinstance(value, (int, float, str))
+
+
+def decode_cursor(sort: str, cursor: str, order: Sequence[SortKey]) -> list[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = data["v"]
+        valid = (
+            data["s"] == sort
+            and isinstance(values, list)
+            and len(values) == len(order)
+            and all(_valid_value(column, v) for (column, _), v in zip(order, values))
+        )
+    except (ValueError, KeyError, TypeError):
+        valid = False
+
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="cursor inválido",
+        )
+    return values
+
+
+def _after(order: Sequence[SortKey], values: Sequence[Any]):
+    # comparación lexicográfica: (a > x) OR (a = x AND b > y) ...
+    clauses = []
+    for i, (column, desc) in enumerate(order):
+        equal = [order[j][0] == values[j] for j in range(i)]
+        step = column < values[i] if desc else column > values[i]
+        clauses.append(and_(*equal, step))
+    return or_(*clauses)
+
+
+def paginate(
+    query: Select,
+    order: Sequence[SortKey],
+    sort: str,
+    limit: int,
+    skip: int = 0,
+    cursor: str | None = None,
+) -> Select:
+    # cursor (keyset) tiene prioridad; skip queda por compatibilidad
+    if cursor:
+        values = decode_cursor(sort, cursor, order)
+        query = query.where(_after(order, values))
+    elif skip:
+        query = query.offset(skip)
+
+    return query.order_by(
+        *[column.desc() if desc else column.asc() for column, desc in order]
+    ).limit(limit)
+
+
+def next_cursor(
+    rows: Sequence[Any],
+    limit: int,
+    sort: str,
+    key: Callable[[Any], Sequence[Any]],
+) -> str | None:
+    # página incompleta => no hay más resultados
+    if rows and len(rows) >= limit:
+        return encode_cursor(sort, key(rows[-1]))
+    return None
+
+
+def set_next_cursor(
+    response: Response,
+    rows: Sequence[Any],
+    limit: int,
+    sort: str,
+    key: Callable[[Any], Sequence[Any]],
+) -> None:
+    cursor = next_cursor(rows, limit, sort, key)
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
@@ -0,0 +1,23 @@
+from typing import Any
+
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+
+class PydanticResponse(ORJSONResponse):
+    """JSON directo desde el serializador de pydantic (núcleo en Rust).
+
+    Para modelos que ya armamos nosotros: evita que FastAPI los vuelva a
+    validar contra ``response_model`` y los pase por ``jsonable_encoder``.
+    """
+
+    def __init__(self, content: Any, adapter: TypeAdapter | None = None, **kwargs):
+        self.adapter = adapter
+        super().__init__(content, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        if self.adapter is not None:
+            return self.adapter.dump_json(content)
+        if isinstance(content, BaseModel):
+            return content.model_dump_json().encode()
+        return super().render(content)
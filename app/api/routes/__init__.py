@@ -1 +1 @@
-from . import products, suppliers, categories, units, product_attributes  # noqa
+from . import products, suppliers, categories, units, product_attributes, monitoring  # noqa
@@ -1,13 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from app.api.deps import get_db_session, get_authenticated_user
+from app.api.deps import (
+    get_db_session,
+    get_read_db_session,
+    get_authenticated_user,
+)
+from app.api.pagination import paginate, set_next_cursor
 from app.schemas.product_schemas import (
     CategoriaCreate,
     CategoriaRead,
 )
 from app.models.product_models import Categoria
+from app.services.reference_data import categorias_cache
+from app.services.response_cache import product_response_cache
 
 router = APIRouter(prefix="/categories", tags=["categories"])
 
@@ -27,21 +34,26 @@ async def create_category(
 
 @router.get("", response_model=list[CategoriaRead])
 async def list_categories(
-    db: AsyncSession = Depends(get_db_session),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db_session),
     _user=Depends(get_authenticated_user),
     skip: int = 0,
     limit: int = Query(50, le=100),
+    cursor: str | None = None,
 ):
-    result = await db.execute(
-        select(Categoria).offset(skip).limit(limit)
+    query = paginate(
+        select(Categoria), [(Categoria.id_categoria, False)], "id", limit, skip, cursor
     )
-    return result.scalars().all()
+    result = await db.execute(query)
+    categories = result.scalars().all()
+    set_next_cursor(response, categories, limit, "id", lambda c: [c.id_categoria])
+    return categories
 
 
 @router.get("/{category_id}", response_model=CategoriaRead)
 async def get_category(
     category_id: int,
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_read_db_session),
     _user=Depends(get_authenticated_user),
 ):
     result = await db.execute(
@@ -73,6 +85,8 @@ async def update_category(
 
     await db.commit()
     await db.refresh(category)
+    categorias_cache.invalidate(category_id)
+    await product_response_cache.clear()
     return category
 
 
@@ -91,3 +105,5 @@ async def delete_category(
 
     await db.delete(category)
     await db.commit()
+    categorias_cache.invalidate(category_id)
+    await product_response_cache.clear()
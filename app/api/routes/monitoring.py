@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from app.core.metrics import REGISTRY
+from app.db.pool import pool_stats
+from app.db.session import engine, read_engine
+from app.services.reference_data import reference_cache_stats
+from app.services.response_cache import product_response_cache
+
+router = APIRouter(tags=["monitoring"])
+
+
+@router.get("/cache/stats")
+async def cache_stats():
+    return {
+        "reference": reference_cache_stats(),
+        "product_responses": product_response_cache.stats(),
+    }
+
+
+@router.get("/db/pool")
+async def db_pool_stats():
+    stats = {"primary": pool_stats(engine)}
+    if read_engine is not None:
+        stats["replica"] = pool_stats(read_engine)
+    return stats
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
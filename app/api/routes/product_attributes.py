@@ -1,30 +1,49 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from app.api.deps import get_db_session, get_authenticated_user
+from app.api.deps import (
+    get_db_session,
+    get_read_db_session,
+    get_tenant_id,
+)
+from app.api.responses import PydanticResponse
 from app.schemas.product_schemas import (
     ProductoAtributoCreate,
     ProductoAtributoRead,
 )
 from app.models.product_models import Producto, ProductoAtributo
+from app.services.outbox import add_events
+from app.services.product_reader import (
+    insert_attributes,
+    load_attributes,
+    replace_attributes,
+)
+from app.services.response_cache import product_response_cache
+from app.services.tenancy import product_scope
 
 router = APIRouter(prefix="/products", tags=["product-attributes"])
 
+_attribute_list_adapter = TypeAdapter(list[ProductoAtributoRead])
+
 
 @router.get("/{product_id}/attributes", response_model=list[ProductoAtributoRead])
 async def list_attributes(
     product_id: int,
-    db: AsyncSession = Depends(get_db_session),
-    _user=Depends(get_authenticated_user),
+    db: AsyncSession = Depends(get_read_db_session),
+    empresa_id: int | None = Depends(get_tenant_id),
 ):
-    result = await db.execute(
-        select(Producto).where(Producto.id_producto == product_id)
+    # sin cargar el producto ni su relación perezosa: dos SELECT explícitos
+    exists = await db.execute(
+        select(Producto.id_producto).where(
+            Producto.id_producto == product_id, *product_scope(empresa_id)
+        )
     )
-    product = result.scalar_one_or_none()
-    if not product:
+    if exists.scalar_one_or_none() is None:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
-    return product.atributos
+    attrs = await load_attributes(db, [product_id])
+    return PydanticResponse(attrs.get(product_id, []), adapter=_attribute_list_adapter)
 
 
 @router.post(
@@ -36,26 +55,47 @@ async def add_attribute(
     product_id: int,
     payload: ProductoAtributoCreate,
     db: AsyncSession = Depends(get_db_session),
-    _user=Depends(get_authenticated_user),
+    empresa_id: int | None = Depends(get_tenant_id),
 ):
-    result = await db.execute(
-        select(Producto).where(Producto.id_producto == product_id)
+    exists = await db.execute(
+        select(Producto.id_producto).where(
+            Producto.id_producto == product_id, *product_scope(empresa_id)
+        )
     )
-    product = result.scalar_one_or_none()
-    if not product:
+    if exists.scalar_one_or_none() is None:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
 
-    attr = ProductoAtributo(
-        nombre_atributo=payload.nombre_atributo,
-        valor=payload.valor,
-        producto=product,
-    )
-    db.add(attr)
+    (attr,) = await insert_attributes(db, product_id, [payload])
+    await add_events(db, "updated", [product_id])
     await db.commit()
-    await db.refresh(attr)
+    # los atributos filtran listados (attr.<nombre>=<valor>)
+    await product_response_cache.invalidate([product_id], lists=True)
     return attr
 
 
+@router.put("/{product_id}/attributes", response_model=list[ProductoAtributoRead])
+async def replace_product_attributes(
+    product_id: int,
+    payload: list[ProductoAtributoCreate],
+    db: AsyncSession = Depends(get_db_session),
+    empresa_id: int | None = Depends(get_tenant_id),
+):
+    # bloquea el producto: dos reemplazos concurrentes no duplican nombres
+    result = await db.execute(
+        select(Producto.id_producto)
+        .where(Producto.id_producto == product_id, *product_scope(empresa_id))
+        .with_for_update()
+    )
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Producto no encontrado")
+
+    atributos = await replace_attributes(db, product_id, payload)
+    await add_events(db, "updated", [product_id])
+    await db.commit()
+    await product_response_cache.invalidate([product_id], lists=True)
+    return atributos
+
+
 @router.delete(
     "/{product_id}/attributes/{attr_id}",
     status_code=status.HTTP_204_NO_CONTENT,
@@ -64,12 +104,15 @@ async def delete_attribute(
     product_id: int,
     attr_id: int,
     db: AsyncSession = Depends(get_db_session),
-    _user=Depends(get_authenticated_user),
+    empresa_id: int | None = Depends(get_tenant_id),
 ):
     result = await db.execute(
-        select(ProductoAtributo).where(
+        select(ProductoAtributo)
+        .join(Producto, Producto.id_producto == ProductoAtributo.productos_id_prod)
+        .where(
             ProductoAtributo.id_atributo == attr_id,
             ProductoAtributo.productos_id_prod == product_id,
+            *product_scope(empresa_id),
         )
     )
     attr = result.scalar_one_or_none()
@@ -77,4 +120,6 @@ async def delete_attribute(
         return
 
     await db.delete(attr)
+    await add_events(db, "updated", [product_id])
     await db.commit()
+    await product_response_cache.invalidate([product_id], lists=True)
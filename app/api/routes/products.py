@@ -1,150 +1,474 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+import hashlib
+import time
+from functools import lru_cache
 
-from app.api.deps import get_db_session, get_authenticated_user
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.api.deps import (
+    get_db_session,
+    get_read_db_session,
+    get_authenticated_user,
+    get_tenant_id,
+)
+from app.api.etag import etag_matches, make_etag, not_modified
+from app.api.pagination import NEXT_CURSOR_HEADER, next_cursor, paginate
+from app.api.responses import PydanticResponse
+from app.core.config import settings
+from app.db.session import read_only, read_session_factory
 from app.schemas.product_schemas import (
+    BulkImportReport,
+    ProductoBatchGet,
+    ProductoBatchResult,
+    ProductoCambios,
     ProductoCreate,
+    ProductoFacetas,
     ProductoRead,
     ProductoUpdate,
 )
-from app.models.product_models import Producto, Categoria, ProductoAtributo
+from app.models.product_models import Producto
+from app.services.bulk_import import import_batch, iter_csv, iter_ndjson
+from app.services.catalog_export import EXPORT_MEDIA_TYPES, stream_products
+from app.services.change_feed import read_changes
+from app.services.outbox import add_events
+from app.services.product_facets import compute_facets
+from app.services.product_filters import ProductFieldset, ProductFilters
+from app.services.product_reader import (
+    CATEGORY_IDS,
+    PRODUCT_COLUMNS,
+    ProductReferences,
+    build_product_read,
+    build_product_reads,
+    build_product_views,
+    fieldset_columns,
+    fieldset_model,
+    insert_attributes,
+    load_references,
+    orphan_error,
+    products_etag,
+    render_product_reads,
+    replace_attributes,
+    set_product_categories,
+)
+from app.services.product_versions import version_column, version_source
+from app.services.response_cache import CachedResponse, product_response_cache
+from app.services.tenancy import check_supplier, check_tenant, product_scope, tenant_key
 
 router = APIRouter(prefix="/products", tags=["products"])
 
+_product_list_adapter = TypeAdapter(list[ProductoRead])
+
+
+@lru_cache(maxsize=256)
+def _fieldset_list_adapter(fields: tuple[str, ...]) -> TypeAdapter:
+    return TypeAdapter(list[fieldset_model(fields)])
+
+# campos que pueden cambiar qué productos aparecen en un listado
+_LIST_MEMBERSHIP_FIELDS = {"nombre", "descripcion", "estado", "categorias_ids", "atributos"}
+
+# columnas que se escriben tal cual desde ProductoCreate / ProductoUpdate
+_CREATE_COLUMNS = [c for c in PRODUCT_COLUMNS if c in ProductoCreate.model_fields]
+_UPDATE_COLUMNS = ["nombre", "descripcion", "stock_minimo_global", "estado", "precio"]
+
+
+def _integrity_error(e: IntegrityError) -> HTTPException:
+    # la BD ya validó: se traduce la restricción violada
+    cause = e.orig.__cause__
+    where = f"{getattr(cause, 'constraint_name', '')} {getattr(cause, 'detail', '')}"
+    sqlstate = getattr(cause, "sqlstate", None)
+    if sqlstate == "23505" and "codigo_sku" in where:
+        detail = "codigo_sku ya existe"
+    elif sqlstate == "23505" and "codigo_barra" in where:
+        detail = "codigo_barra ya existe"
+    elif sqlstate == "23503" and "categorias_categoria" in where:
+        detail = "Categoría inexistente"
+    elif sqlstate == "23503" and "proveedores_id_proveedor" in where:
+        detail = "Proveedor inexistente"
+    elif sqlstate == "23503" and "unidades_medida_id_unidad" in where:
+        detail = "Unidad de medida inexistente"
+    elif sqlstate == "23503":
+        detail = "Referencia inexistente"
+    else:
+        detail = "No se pudo guardar el producto"
+    return HTTPException(status_code=400, detail=detail)
+
+
+def _product_columns():
+    return [Producto.__table__.c[c] for c in PRODUCT_COLUMNS]
+
+
+async def _list_page(
+    db: AsyncSession,
+    filters: ProductFilters,
+    limit: int,
+    skip: int,
+    cursor: str | None,
+    fields: tuple[str, ...] | None = None,
+) -> tuple[list, ProductReferences, str, dict[str, str]]:
+    # columnas + versión de fila + ids de categorías; atributos solo si hay
+    # que responder 200
+    rank = filters.rank
+    with_categories = fields is None or "categorias" in fields
+    query = select(
+        *fieldset_columns(fields),
+        version_column(await version_source(db)).label("version"),
+        *([CATEGORY_IDS.label("category_ids")] if with_categories else []),
+        *([rank.label("rank")] if rank is not None else []),
+    )
+    query = filters.apply(query)
+
+    query = paginate(query, filters.order, filters.sort, limit, skip, cursor)
+    rows = (await db.execute(query)).all()
+
+    headers = {}
+    next_page = next_cursor(
+        rows, limit, filters.sort,
+        lambda row: [row.rank, row.id_producto] if rank is not None else [row.id_producto],
+    )
+    if next_page:
+        headers[NEXT_CURSOR_HEADER] = next_page
+    refs = await load_references(db, rows, fields, filters.empresa_id)
+    return rows, refs, products_etag(rows, refs, fields), headers
+
+
+async def _render_list(
+    db: AsyncSession,
+    rows: list,
+    refs: ProductReferences,
+    etag: str,
+    headers: dict[str, str],
+    started: float,
+    fields: tuple[str, ...] | None = None,
+) -> CachedResponse:
+    if fields is None:
+        body = _product_list_adapter.dump_json(await render_product_reads(db, rows, refs))
+    else:
+        # sin relaciones salvo las pedidas en fields
+        views = await build_product_views(db, rows, fields, refs)
+        body = _fieldset_list_adapter(fields).dump_json(views)
+    return CachedResponse(
+        body=body,
+        etag=etag,
+        product_ids=tuple(row.id_producto for row in rows),
+        is_list=True,
+        headers=headers,
+        computed_at=started,
+    )
+
+
+async def _load_product(db: AsyncSession, product_id: int, empresa_id: int | None):
+    result = await db.execute(
+        select(
+            *_product_columns(),
+            version_column(await version_source(db)).label("version"),
+            CATEGORY_IDS.label("category_ids"),
+        ).where(Producto.id_producto == product_id, *product_scope(empresa_id))
+    )
+    return result.one_or_none()
+
+
+async def _render_product(
+    db: AsyncSession, product, refs: ProductReferences, etag: str, started: float
+) -> CachedResponse:
+    reads = await render_product_reads(db, [product], refs)
+    if not reads:
+        raise orphan_error(product.id_producto)
+    read = reads[0]
+    return CachedResponse(
+        body=read.model_dump_json().encode(),
+        etag=etag,
+        product_ids=(product.id_producto,),
+        is_list=False,
+        computed_at=started,
+    )
+
 
 @router.post("", response_model=ProductoRead, status_code=status.HTTP_201_CREATED)
 async def create_product(
     payload: ProductoCreate,
     db: AsyncSession = Depends(get_db_session),
-    _user=Depends(get_authenticated_user),
+    empresa_id: int | None = Depends(get_tenant_id),
 ):
-    existing = await db.execute(
-        select(Producto).where(Producto.codigo_sku == payload.codigo_sku)
-    )
-    if existing.scalar_one_or_none():
-        raise HTTPException(status_code=400, detail="codigo_sku ya existe")
-
-    product = Producto(
-    codigo_sku=payload.codigo_sku,
-    codigo_barra=payload.codigo_barra,
-    nombre=payload.nombre,
-    descripcion=payload.descripcion,
-    stock_minimo_global=payload.stock_minimo_global,
-    estado=payload.estado,
-    precio=payload.precio,
-    proveedores_id_proveedor=payload.proveedores_id_proveedor,
-    unidades_medida_id_unidad=payload.unidades_medida_id_unidad,
-    empresas_id_empresa=payload.empresas_id_empresa,  
-)
-
-
-
-    # categorías
-    if payload.categorias_ids:
+    check_tenant(empresa_id, payload.empresas_id_empresa)
+    await check_supplier(db, payload.empresas_id_empresa, payload.proveedores_id_proveedor)
+    # sin SELECT previo: la restricción UNIQUE decide (y cierra la carrera)
+    values = payload.model_dump(include=set(_CREATE_COLUMNS))
+    try:
         result = await db.execute(
-            select(Categoria).where(
-                Categoria.id_categoria.in_(payload.categorias_ids)
-            )
+            insert(Producto).values(**values).returning(*_product_columns())
         )
-        product.categorias = result.scalars().all()
-
-    # atributos
-    for attr in payload.atributos:
-        product.atributos.append(
-            ProductoAtributo(
-                nombre_atributo=attr.nombre_atributo,
-                valor=attr.valor,
-            )
+        product = result.one()
+        atributos = await insert_attributes(db, product.id_producto, payload.atributos)
+        # categorías validadas contra la caché de referencia
+        category_ids = await set_product_categories(
+            db, product.id_producto, payload.categorias_ids
+        )
+        # respuesta desde memoria + cachés, sin refresh ni recarga
+        read = await build_product_read(db, product, category_ids, atributos, empresa_id)
+        await add_events(db, "created", [product.id_producto])
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        raise _integrity_error(e)
+
+    # un producto nuevo puede entrar en cualquier listado
+    await product_response_cache.invalidate([product.id_producto], lists=True)
+    return PydanticResponse(read, status_code=status.HTTP_201_CREATED)
+
+
+@router.post("/bulk", response_model=BulkImportReport)
+async def bulk_import_products(
+    request: Request,
+    db: AsyncSession = Depends(get_db_session),
+    empresa_id: int | None = Depends(get_tenant_id),
+):
+    content_type = request.headers.get("content-type", "")
+    if "csv" in content_type:
+        records = iter_csv(request.stream())
+    elif "ndjson" in content_type or "jsonl" in content_type:
+        records = iter_ndjson(request.stream())
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Usa Content-Type application/x-ndjson o text/csv",
         )
 
-    db.add(product)
-    await db.commit()
-    await db.refresh(product)
+    results = []
+    seen_skus: set[str] = set()
+    batch = []
+    row = 0
+    async for record in records:
+        row += 1
+        batch.append((row, record))
+        if len(batch) >= settings.BULK_IMPORT_BATCH_SIZE:
+            results.extend(await import_batch(db, batch, seen_skus, empresa_id))
+            batch = []
+    if batch:
+        results.extend(await import_batch(db, batch, seen_skus, empresa_id))
+
+    created = sum(1 for r in results if r.ok)
+    if created:
+        await product_response_cache.invalidate(
+            (r.id_producto for r in results if r.ok), lists=True
+        )
+    return PydanticResponse(
+        BulkImportReport.model_construct(
+            total=len(results),
+            created=created,
+            failed=len(results) - created,
+            results=results,
+        )
+    )
+
 
-    # 🔥 recargar el producto con todas sus relaciones para evitar lazy-load async
+@router.post("/batch-get", response_model=ProductoBatchResult)
+@read_only
+async def batch_get_products(
+    payload: ProductoBatchGet,
+    db: AsyncSession = Depends(get_read_db_session),
+    empresa_id: int | None = Depends(get_tenant_id),
+):
+    ids = list(dict.fromkeys(payload.ids))
+    skus = list(dict.fromkeys(payload.codigos_sku))
+    if not ids and not skus:
+        raise HTTPException(status_code=400, detail="Indica ids o codigos_sku")
+    if len(ids) + len(skus) > settings.BATCH_GET_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Máximo {settings.BATCH_GET_MAX_ITEMS} productos por llamada",
+        )
+
+    # un solo IN para ids y SKUs; relaciones en lote (build_product_reads)
+    conditions = []
+    if ids:
+        conditions.append(Producto.id_producto.in_(ids))
+    if skus:
+        conditions.append(Producto.codigo_sku.in_(skus))
     result = await db.execute(
-        select(Producto)
-        .options(
-            selectinload(Producto.proveedor),
-            selectinload(Producto.unidad_medida),
-            selectinload(Producto.categorias),
-            selectinload(Producto.atributos),
+        select(*_product_columns()).where(or_(*conditions), *product_scope(empresa_id))
+    )
+    rows = result.all()
+
+    by_id = {row.id_producto: row for row in rows}
+    by_sku = {row.codigo_sku: row for row in rows}
+
+    # orden pedido: primero ids, luego SKUs, sin repetir productos
+    ordered = {}
+    for id_ in ids:
+        if id_ in by_id:
+            ordered.setdefault(id_, by_id[id_])
+    for sku in skus:
+        if sku in by_sku:
+            row = by_sku[sku]
+            ordered.setdefault(row.id_producto, row)
+
+    # un producto huérfano (sin proveedor/unidad válidos) se informa como faltante
+    productos = await build_product_reads(db, list(ordered.values()), empresa_id)
+    found_ids = {p.id_producto for p in productos}
+    found_skus = {p.codigo_sku for p in productos}
+    return PydanticResponse(
+        ProductoBatchResult.model_construct(
+            productos=productos,
+            missing_ids=[i for i in ids if i not in found_ids],
+            missing_skus=[s for s in skus if s not in found_skus],
         )
-        .where(Producto.id_producto == product.id_producto)
     )
-    product_full = result.scalar_one()
-    return product_full
 
 
 @router.get("", response_model=list[ProductoRead])
 async def list_products(
-    db: AsyncSession = Depends(get_db_session),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db_session),
     _user=Depends(get_authenticated_user),
     skip: int = 0,
     limit: int = Query(50, le=100),
-    search: str | None = None,
-    categoria_id: int | None = None,
-    proveedor_id: int | None = None,
-    only_active: bool = True,
+    cursor: str | None = None,
+    filters: ProductFilters = Depends(),
+    fieldset: ProductFieldset = Depends(),
 ):
-    # base query con relaciones
-    query = (
-        select(Producto)
-        .options(
-            selectinload(Producto.proveedor),
-            selectinload(Producto.unidad_medida),
-            selectinload(Producto.categorias),
-            selectinload(Producto.atributos),
-        )
-    )
-
-    if only_active:
-        query = query.where(Producto.estado == True)  # noqa
-
-    if search:
-        like = f"%{search}%"
-        query = query.where(
-            (Producto.nombre.ilike(like))
-            | (Producto.descripcion.ilike(like))
-            | (Producto.codigo_sku.ilike(like))
+    cache = product_response_cache
+    key = cache.key("list", tenant_key(filters.empresa_id), request)
+    fields = fieldset.fields
+
+    async def render(session: AsyncSession) -> CachedResponse:
+        started = time.time()
+        rows, refs, etag, headers = await _list_page(session, filters, limit, skip, cursor, fields)
+        return await _render_list(session, rows, refs, etag, headers, started, fields)
+
+    use_cache = cache.active(request)
+    if use_cache:
+        cached = await cache.get(key)
+        if cached is not None:
+            entry, fresh = cached
+            if not fresh:
+                cache.refresh(key, render, read_session_factory(request))
+            return cache.respond(request, entry, "HIT" if fresh else "STALE")
+
+    started = time.time()
+    rows, refs, etag, headers = await _list_page(db, filters, limit, skip, cursor, fields)
+    if etag_matches(request, etag):
+        # el cliente ya tiene esta página: sin relaciones ni serialización
+        return not_modified(etag, {**headers, "Cache-Control": cache.cache_control()})
+
+    entry = await _render_list(db, rows, refs, etag, headers, started, fields)
+    if use_cache:
+        await cache.set(key, entry, db)
+    return cache.respond(request, entry, "MISS" if use_cache else "BYPASS")
+
+
+@router.get("/facets", response_model=ProductoFacetas)
+async def product_facets(
+    request: Request,
+    db: AsyncSession = Depends(get_read_db_session),
+    _user=Depends(get_authenticated_user),
+    filters: ProductFilters = Depends(),
+):
+    # mismos filtros que el listado; sin paginación ni proyección
+    cache = product_response_cache
+    key = cache.key("facets", tenant_key(filters.empresa_id), request)
+
+    async def render(session: AsyncSession) -> CachedResponse:
+        started = time.time()
+        body = (await compute_facets(session, filters)).model_dump_json().encode()
+        # cuenta todo el resultado: cualquier cambio de listados la invalida
+        return CachedResponse(
+            body=body,
+            etag=make_etag([hashlib.md5(body).hexdigest()]),
+            product_ids=(),
+            is_list=True,
+            computed_at=started,
         )
 
-    if proveedor_id:
-        query = query.where(Producto.proveedores_id_proveedor == proveedor_id)
+    use_cache = cache.active(request)
+    if use_cache:
+        cached = await cache.get(key)
+        if cached is not None:
+            entry, fresh = cached
+            if not fresh:
+                cache.refresh(key, render, read_session_factory(request))
+            return cache.respond(request, entry, "HIT" if fresh else "STALE")
+
+    entry = await render(db)
+    if use_cache:
+        await cache.set(key, entry, db)
+    return cache.respond(request, entry, "MISS" if use_cache else "BYPASS")
+
+
+@router.get("/changes", response_model=ProductoCambios)
+async def product_changes(
+    since: str | None = None,
+    limit: int = Query(500, ge=1, le=1000),
+    db: AsyncSession = Depends(get_read_db_session),
+    empresa_id: int | None = Depends(get_tenant_id),
+):
+    # sincronización incremental: guardar next_token y repetir mientras has_more
+    return PydanticResponse(await read_changes(db, since, limit, empresa_id))
 
-    if categoria_id:
-        query = query.join(Producto.categorias).where(
-            Categoria.id_categoria == categoria_id
-        )
 
-    query = query.offset(skip).limit(limit)
-    result = await db.execute(query)
-    return result.scalars().unique().all()
+@router.get("/export")
+async def export_products(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    filters: ProductFilters = Depends(),
+    _user=Depends(get_authenticated_user),
+):
+    # la sesión vive dentro del generador: el streaming termina después
+    # de que FastAPI cierra las dependencias
+    return StreamingResponse(
+        stream_products(filters, format, read_session_factory(request)),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="productos.{format}"'
+        },
+    )
 
 
 @router.get("/{product_id}", response_model=ProductoRead)
 async def get_product(
     product_id: int,
-    db: AsyncSession = Depends(get_db_session),
-    _user=Depends(get_authenticated_user),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db_session),
+    empresa_id: int | None = Depends(get_tenant_id),
 ):
-    result = await db.execute(
-        select(Producto)
-        .options(
-            selectinload(Producto.proveedor),
-            selectinload(Producto.unidad_medida),
-            selectinload(Producto.categorias),
-            selectinload(Producto.atributos),
-        )
-        .where(Producto.id_producto == product_id)
-    )
-
-    product = result.scalar_one_or_none()
+    cache = product_response_cache
+    key = cache.key("get", tenant_key(empresa_id), request, product_id)
+
+    async def render(session: AsyncSession) -> CachedResponse | None:
+        started = time.time()
+        product = await _load_product(session, product_id, empresa_id)
+        if not product:
+            return None
+        refs = await load_references(session, [product], empresa_id=empresa_id)
+        return await _render_product(session, product, refs, products_etag([product], refs), started)
+
+    use_cache = cache.active(request)
+    if use_cache:
+        cached = await cache.get(key)
+        if cached is not None:
+            entry, fresh = cached
+            if not fresh:
+                cache.refresh(key, render, read_session_factory(request))
+            return cache.respond(request, entry, "HIT" if fresh else "STALE")
+
+    started = time.time()
+    product = await _load_product(db, product_id, empresa_id)
     if not product:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
-    return product
+
+    # If-None-Match: 304 sin cargar atributos ni serializar
+    refs = await load_references(db, [product], empresa_id=empresa_id)
+    etag = products_etag([product], refs)
+    if etag_matches(request, etag):
+        return not_modified(etag, {"Cache-Control": cache.cache_control()})
+
+    entry = await _render_product(db, product, refs, etag, started)
+    if use_cache:
+        await cache.set(key, entry, db)
+    return cache.respond(request, entry, "MISS" if use_cache else "BYPASS")
 
 
 @router.patch("/{product_id}", response_model=ProductoRead)
@@ -152,75 +476,72 @@ async def update_product(
     product_id: int,
     payload: ProductoUpdate,
     db: AsyncSession = Depends(get_db_session),
-    _user=Depends(get_authenticated_user),
+    empresa_id: int | None = Depends(get_tenant_id),
 ):
-    result = await db.execute(
-        select(Producto).where(Producto.id_producto == product_id)
-    )
-    product = result.scalar_one_or_none()
-    if not product:
-        raise HTTPException(status_code=404, detail="Producto no encontrado")
-
-    data = payload.dict(exclude_unset=True)
-
-    for field in ["nombre", "descripcion", "stock_minimo_global", "estado", "precio"]:
-        if field in data:
-            setattr(product, field, data[field])
-
-    # actualización de categorías
-    if "categorias_ids" in data and data["categorias_ids"] is not None:
-        result = await db.execute(
-            select(Categoria).where(
-                Categoria.id_categoria.in_(data["categorias_ids"])
+    data = payload.model_dump(exclude_unset=True)
+    changes = {f: data[f] for f in _UPDATE_COLUMNS if f in data}
+
+    try:
+        # UPDATE ... RETURNING: una sola ida a la BD para validar y leer
+        if changes:
+            query = (
+                update(Producto)
+                .where(Producto.id_producto == product_id, *product_scope(empresa_id))
+                .values(**changes)
+                .returning(*_product_columns())
+                .execution_options(synchronize_session=False)
             )
-        )
-        product.categorias = result.scalars().all()
-
-    # reemplazo completo de atributos
-    if "atributos" in data and data["atributos"] is not None:
-        # eliminar todos y volver a crear
-        for attr in list(product.atributos):
-            await db.delete(attr)
-        product.atributos = []
-        for attr in data["atributos"]:
-            product.atributos.append(
-                ProductoAtributo(
-                    nombre_atributo=attr.nombre_atributo,
-                    valor=attr.valor,
-                )
+        else:
+            # bloquea la fila: dos reemplazos de atributos no se pisan
+            query = (
+                select(*_product_columns())
+                .where(Producto.id_producto == product_id, *product_scope(empresa_id))
+                .with_for_update()
+            )
+        product = (await db.execute(query)).one_or_none()
+        if not product:
+            raise HTTPException(status_code=404, detail="Producto no encontrado")
+
+        # actualización de categorías
+        category_ids = None
+        if payload.categorias_ids is not None:
+            category_ids = await set_product_categories(
+                db, product_id, payload.categorias_ids, replace=True
             )
 
-    await db.commit()
-    await db.refresh(product)
+        # reemplazo completo de atributos (por diferencia)
+        atributos = None
+        if payload.atributos is not None:
+            atributos = await replace_attributes(db, product_id, payload.atributos)
 
-    # recargar con relaciones
-    result = await db.execute(
-        select(Producto)
-        .options(
-            selectinload(Producto.proveedor),
-            selectinload(Producto.unidad_medida),
-            selectinload(Producto.categorias),
-            selectinload(Producto.atributos),
-        )
-        .where(Producto.id_producto == product.id_producto)
+        read = await build_product_read(db, product, category_ids, atributos, empresa_id)
+        await add_events(db, "updated", [product_id])
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        raise _integrity_error(e)
+
+    await product_response_cache.invalidate(
+        [product_id], lists=bool(_LIST_MEMBERSHIP_FIELDS & data.keys())
     )
-    product_full = result.scalar_one()
-    return product_full
+    return PydanticResponse(read)
 
 
 @router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_product(
     product_id: int,
     db: AsyncSession = Depends(get_db_session),
-    _user=Depends(get_authenticated_user),
+    empresa_id: int | None = Depends(get_tenant_id),
 ):
     result = await db.execute(
-        select(Producto).where(Producto.id_producto == product_id)
+        select(Producto).where(Producto.id_producto == product_id, *product_scope(empresa_id))
     )
     product = result.scalar_one_or_none()
     if not product:
         return
 
-    # soft delete
+    # soft delete: cambian las respuestas que lo contenían y los conteos de facetas
     product.estado = False
+    await add_events(db, "deleted", [product_id])
     await db.commit()
+    await product_response_cache.invalidate([product_id], lists=True)
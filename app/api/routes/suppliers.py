@@ -1,14 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from app.api.deps import get_db_session, get_authenticated_user
+from app.api.deps import (
+    get_db_session,
+    get_read_db_session,
+    get_tenant_id,
+)
+from app.api.pagination import paginate, set_next_cursor
 from app.schemas.product_schemas import (
     ProveedorCreate,
     ProveedorRead,
     ProveedorUpdate,
 )
 from app.models.product_models import Proveedor
+from app.services.reference_data import proveedores_cache
+from app.services.response_cache import product_response_cache
+from app.services.tenancy import check_tenant, supplier_scope
 
 router = APIRouter(prefix="/suppliers", tags=["suppliers"])
 
@@ -17,8 +25,9 @@ router = APIRouter(prefix="/suppliers", tags=["suppliers"])
 async def create_supplier(
     payload: ProveedorCreate,
     db: AsyncSession = Depends(get_db_session),
-    _user=Depends(get_authenticated_user),
+    empresa_id: int | None = Depends(get_tenant_id),
 ):
+    check_tenant(empresa_id, payload.empresas_id_emp)
     supplier = Proveedor(**payload.dict())
     db.add(supplier)
     await db.commit()
@@ -28,28 +37,37 @@ async def create_supplier(
 
 @router.get("", response_model=list[ProveedorRead])
 async def list_suppliers(
-    db: AsyncSession = Depends(get_db_session),
-    _user=Depends(get_authenticated_user),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db_session),
+    empresa_id: int | None = Depends(get_tenant_id),
     skip: int = 0,
     limit: int = Query(50, le=100),
+    cursor: str | None = None,
     only_active: bool = True,
 ):
-    query = select(Proveedor)
+    # empresa primero: coincide con ix_proveedores_empresa_estado_id
+    query = select(Proveedor).where(*supplier_scope(empresa_id))
     if only_active:
         query = query.where(Proveedor.estado == True)  # noqa
-    query = query.offset(skip).limit(limit)
+    query = paginate(
+        query, [(Proveedor.id_proveedor, False)], "id", limit, skip, cursor
+    )
     result = await db.execute(query)
-    return result.scalars().all()
+    suppliers = result.scalars().all()
+    set_next_cursor(response, suppliers, limit, "id", lambda s: [s.id_proveedor])
+    return suppliers
 
 
 @router.get("/{supplier_id}", response_model=ProveedorRead)
 async def get_supplier(
     supplier_id: int,
-    db: AsyncSession = Depends(get_db_session),
-    _user=Depends(get_authenticated_user),
+    db: AsyncSession = Depends(get_read_db_session),
+    empresa_id: int | None = Depends(get_tenant_id),
 ):
     result = await db.execute(
-        select(Proveedor).where(Proveedor.id_proveedor == supplier_id)
+        select(Proveedor).where(
+            Proveedor.id_proveedor == supplier_id, *supplier_scope(empresa_id)
+        )
     )
     supplier = result.scalar_one_or_none()
     if not supplier:
@@ -62,10 +80,12 @@ async def update_supplier(
     supplier_id: int,
     payload: ProveedorUpdate,
     db: AsyncSession = Depends(get_db_session),
-    _user=Depends(get_authenticated_user),
+    empresa_id: int | None = Depends(get_tenant_id),
 ):
     result = await db.execute(
-        select(Proveedor).where(Proveedor.id_proveedor == supplier_id)
+        select(Proveedor).where(
+            Proveedor.id_proveedor == supplier_id, *supplier_scope(empresa_id)
+        )
     )
     supplier = result.scalar_one_or_none()
     if not supplier:
@@ -77,6 +97,8 @@ async def update_supplier(
 
     await db.commit()
     await db.refresh(supplier)
+    proveedores_cache.invalidate(supplier_id)
+    await product_response_cache.clear()
     return supplier
 
 
@@ -84,13 +106,17 @@ async def update_supplier(
 async def delete_supplier(
     supplier_id: int,
     db: AsyncSession = Depends(get_db_session),
-    _user=Depends(get_authenticated_user),
+    empresa_id: int | None = Depends(get_tenant_id),
 ):
     result = await db.execute(
-        select(Proveedor).where(Proveedor.id_proveedor == supplier_id)
+        select(Proveedor).where(
+            Proveedor.id_proveedor == supplier_id, *supplier_scope(empresa_id)
+        )
     )
     supplier = result.scalar_one_or_none()
     if not supplier:
         return
     supplier.estado = False
     await db.commit()
+    proveedores_cache.invalidate(supplier_id)
+    await product_response_cache.clear()
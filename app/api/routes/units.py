@@ -1,13 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
-from app.api.deps import get_db_session, get_authenticated_user
+from app.api.deps import (
+    get_db_session,
+    get_read_db_session,
+    get_authenticated_user,
+)
+from app.api.pagination import paginate, set_next_cursor
 from app.schemas.product_schemas import (
     UnidadMedidaCreate,
     UnidadMedidaRead,
 )
 from app.models.product_models import UnidadMedida
+from app.services.reference_data import unidades_cache
+from app.services.response_cache import product_response_cache
 
 router = APIRouter(prefix="/units", tags=["units"])
 
@@ -27,21 +34,26 @@ async def create_unit(
 
 @router.get("", response_model=list[UnidadMedidaRead])
 async def list_units(
-    db: AsyncSession = Depends(get_db_session),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db_session),
     _user=Depends(get_authenticated_user),
     skip: int = 0,
     limit: int = Query(50, le=100),
+    cursor: str | None = None,
 ):
-    result = await db.execute(
-        select(UnidadMedida).offset(skip).limit(limit)
+    query = paginate(
+        select(UnidadMedida), [(UnidadMedida.id_unidad, False)], "id", limit, skip, cursor
     )
-    return result.scalars().all()
+    result = await db.execute(query)
+    units = result.scalars().all()
+    set_next_cursor(response, units, limit, "id", lambda u: [u.id_unidad])
+    return units
 
 
 @router.get("/{unit_id}", response_model=UnidadMedidaRead)
 async def get_unit(
     unit_id: int,
-    db: AsyncSession = Depends(get_db_session),
+    db: AsyncSession = Depends(get_read_db_session),
     _user=Depends(get_authenticated_user),
 ):
     result = await db.execute(
@@ -73,6 +85,8 @@ async def update_unit(
 
     await db.commit()
     await db.refresh(unit)
+    unidades_cache.invalidate(unit_id)
+    await product_response_cache.clear()
     return unit
 
 
@@ -91,3 +105,5 @@ async def delete_unit(
 
     await db.delete(unit)
     await db.commit()
+    unidades_cache.invalidate(unit_id)
+    await product_response_cache.clear()
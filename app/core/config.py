@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List, Optional
 
 
 class Settings(BaseSettings):
@@ -11,10 +11,126 @@ class Settings(BaseSettings):
     SUPABASE_URL: str
     SUPABASE_SERVICE_ROLE_KEY: str
 
+    # Pool de conexiones (SQLAlchemy + asyncpg)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 10.0
+    # reciclar conexiones antes de que el servidor / pooler las corte por idle
+    DB_POOL_RECYCLE: int = 1800
+    # SELECT 1 en cada checkout (una ida más por request): activarlo solo si
+    # algo corta conexiones antes de DB_POOL_RECYCLE (failover, proxy agresivo)
+    DB_POOL_PRE_PING: bool = False
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # Supabase pooler / PgBouncer en modo transacción (puerto 6543)
+    DB_PGBOUNCER_MODE: bool = False
+
+    # Réplica de lectura (opcional): GETs pesados fuera del primario
+    DATABASE_READ_URL: Optional[str] = None
+    # segundos que un cliente que acaba de escribir sigue leyendo del primario
+    READ_YOUR_WRITES_SECONDS: int = 5
+    READ_YOUR_WRITES_COOKIE: str = "db_primary_until"
+
+    # Cliente HTTP async hacia Supabase (auth / admin)
+    SUPABASE_HTTP_MAX_CONNECTIONS: int = 20
+    SUPABASE_HTTP_MAX_KEEPALIVE: int = 10
+    SUPABASE_HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    SUPABASE_HTTP_TIMEOUT_SECONDS: float = 5.0
+    SUPABASE_MAX_CONCURRENCY: int = 8
+
     # Auth
     JWT_SECRET: str
     COOKIE_NAME: str = "session"
 
+    # Verificación de tokens
+    # "local": firma y expiración se validan aquí (JWT_SECRET o JWKS)
+    # "remote": se consulta siempre a Supabase (auth.get_user)
+    AUTH_VERIFY_MODE: str = "local"
+    # en modo local, consultar a Supabase solo si no hay llave local para el
+    # token (JWKS caído o sin secreto); nunca por firma inválida ni kid desconocido
+    AUTH_REMOTE_FALLBACK: bool = False
+    JWT_ALGORITHMS: List[str] = ["HS256"]
+    JWT_AUDIENCE: Optional[str] = "authenticated"
+    JWT_JWKS_URL: Optional[str] = None
+    JWT_JWKS_TTL_SECONDS: int = 3600
+    # kid desconocido: el JWKS se recarga como mucho una vez por intervalo
+    # (y el kid queda marcado como desconocido ese tiempo)
+    JWT_JWKS_MIN_REFRESH_SECONDS: int = 60
+    AUTH_TOKEN_CACHE_SIZE: int = 10_000
+    AUTH_TOKEN_CACHE_TTL_SECONDS: int = 300
+
+    # Búsqueda de productos: "ilike" (legacy) | "fulltext" (tsvector + pg_trgm,
+    # requiere migrations/001_product_search.sql)
+    PRODUCT_SEARCH_MODE: str = "ilike"
+    # máximo de filtros attr.<nombre>=<valor> por request
+    PRODUCT_ATTRIBUTE_FILTERS_MAX: int = 10
+    # ETag de productos: "version" (columna de migrations/003, sin costo extra),
+    # "hash" (md5 del contenido en la BD) o "auto" (version si está aplicada)
+    PRODUCT_ETAG_SOURCE: str = "auto"
+    # GET /products/facets: valores más frecuentes por atributo
+    FACETS_MAX_VALUES: int = 50
+
+    # Multi-empresa: productos y proveedores se acotan a la empresa del usuario
+    # (claim app_metadata.empresa_id). Con False, un usuario sin el claim ve
+    # todas las empresas (instalaciones de una sola empresa)
+    TENANT_REQUIRED: bool = True
+
+    # Caché en memoria de tablas de referencia (categorías, unidades, proveedores)
+    REFERENCE_CACHE_SIZE: int = 5_000
+    REFERENCE_CACHE_TTL_SECONDS: int = 300
+
+    # Carga masiva (POST /products/bulk)
+    BULK_IMPORT_BATCH_SIZE: int = 1_000
+    BULK_IMPORT_USE_COPY: bool = True
+
+    # Export en streaming (GET /products/export)
+    EXPORT_CHUNK_SIZE: int = 1_000
+
+    # Rate limit (token bucket). Backend "memory" (por proceso) o "redis"
+    # (compartido entre workers; cualquier servidor compatible con Redis)
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_REDIS_URL: str = "redis://localhost:6379/0"
+    RATE_LIMIT_PER_IP: str = "300/minute"
+    RATE_LIMIT_PER_USER: str = "600/minute"
+    # {"POST /api/v1/products/bulk": "10/minute", "/api/v1/products/export": "30/hour"}
+    RATE_LIMIT_ROUTES: Dict[str, str] = {}
+    RATE_LIMIT_MAX_KEYS: int = 100_000
+
+    # Logging (loguru, escritura en un hilo aparte)
+    LOG_LEVEL: str = "INFO"
+    LOG_JSON: bool = False
+    # /metrics, /cache/stats y /db/pool piden usuario autenticado; True solo si
+    # esas rutas no son alcanzables desde afuera (red interna / sidecar)
+    MONITORING_PUBLIC: bool = False
+
+    # POST /products/batch-get: máximo de ids + SKUs por llamada
+    BATCH_GET_MAX_ITEMS: int = 500
+
+    # Caché de respuestas de GET /products (0 = desactivada)
+    RESPONSE_CACHE_SIZE: int = 2_000
+    RESPONSE_CACHE_TTL_SECONDS: float = 5.0
+    # servir la copia vencida hasta N s más mientras se recalcula en segundo plano
+    RESPONSE_CACHE_STALE_SECONDS: float = 0.0
+    # max-age que se anuncia al cliente en Cache-Control
+    RESPONSE_CACHE_CONTROL_MAX_AGE: int = 0
+    # "memory": por proceso (la invalidación no llega a otros workers) | "redis": compartida
+    RESPONSE_CACHE_BACKEND: str = "memory"
+    RESPONSE_CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+
+    # Outbox de eventos de productos (requiere migrations/004_product_outbox.sql).
+    # Sinks: webhook (POST JSON) y/o archivo NDJSON; sin ninguno solo se acumulan
+    OUTBOX_ENABLED: bool = False
+    OUTBOX_WEBHOOK_URL: Optional[str] = None
+    OUTBOX_WEBHOOK_TIMEOUT_SECONDS: float = 5.0
+    OUTBOX_FILE_PATH: Optional[str] = None
+    OUTBOX_BATCH_SIZE: int = 200
+    OUTBOX_POLL_SECONDS: float = 1.0
+    # reintentos: base * 2^intentos (con jitter), hasta el máximo
+    OUTBOX_RETRY_BASE_SECONDS: float = 1.0
+    OUTBOX_RETRY_MAX_SECONDS: float = 300.0
+    # un lote tomado y no confirmado vuelve a estar disponible tras el lease
+    OUTBOX_LEASE_SECONDS: float = 60.0
+    OUTBOX_RETENTION_HOURS: int = 72
+
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = ["*"]
 
@@ -0,0 +1,18 @@
+import sys
+
+from loguru import logger
+
+from app.core.config import settings
+
+
+def setup_logging() -> None:
+    # enqueue=True: el request solo encola el registro; un hilo aparte escribe
+    logger.remove()
+    logger.add(
+        sys.stderr,
+        level=settings.LOG_LEVEL,
+        serialize=settings.LOG_JSON,
+        enqueue=True,
+        backtrace=False,
+        diagnose=False,
+    )
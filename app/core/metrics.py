@@ -0,0 +1,99 @@
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from app.db.pool import pool_stats
+from app.db.session import engine, read_engine
+from app.security.auth import token_cache_stats
+from app.services.reference_data import reference_cache_stats
+from app.services.response_cache import product_response_cache
+
+# registro propio: solo métricas del servicio (sin las del proceso por defecto)
+REGISTRY = CollectorRegistry(auto_describe=True)
+
+REQUESTS = Counter(
+    "http_requests_total",
+    "Requests HTTP por ruta (plantilla) y clase de status",
+    ["method", "route", "status_class"],
+    registry=REGISTRY,
+)
+LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Latencia de requests HTTP por ruta (plantilla)",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    registry=REGISTRY,
+)
+IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests HTTP en curso",
+    registry=REGISTRY,
+)
+
+OUTBOX_EVENTS = Counter(
+    "outbox_events_total",
+    "Eventos del outbox por resultado (published / failed)",
+    ["result"],
+    registry=REGISTRY,
+)
+
+
+class _DBPoolCollector:
+    def collect(self):
+        engines = {"primary": engine}
+        if read_engine is not None:
+            engines["replica"] = read_engine
+        stats = {name: pool_stats(e) for name, e in engines.items()}
+
+        for name, doc, key in (
+            ("db_pool_size", "Tamaño configurado del pool", "size"),
+            ("db_pool_checked_out", "Conexiones en uso", "checked_out"),
+            ("db_pool_checked_in", "Conexiones libres en el pool", "checked_in"),
+            ("db_pool_overflow", "Conexiones por encima de pool_size", "overflow"),
+            ("db_pool_max_wait_seconds", "Mayor espera por una conexión", "max_wait_seconds"),
+        ):
+            family = GaugeMetricFamily(name, doc, labels=["engine"])
+            for engine_name, values in stats.items():
+                family.add_metric([engine_name], values[key])
+            yield family
+        for name, doc, key in (
+            ("db_pool_checkouts", "Conexiones entregadas por el pool", "checkouts"),
+            ("db_pool_wait_seconds", "Tiempo total esperando conexiones", "wait_seconds_total"),
+            ("db_pool_timeouts", "Checkouts que agotaron DB_POOL_TIMEOUT", "timeouts"),
+        ):
+            family = CounterMetricFamily(name, doc, labels=["engine"])
+            for engine_name, values in stats.items():
+                family.add_metric([engine_name], values[key])
+            yield family
+
+
+class _CacheCollector:
+    def collect(self):
+        caches = {f"reference_{k}": v for k, v in reference_cache_stats().items()}
+        caches["auth_tokens"] = token_cache_stats()
+        caches["product_responses"] = product_response_cache.stats()
+
+        hits = CounterMetricFamily("cache_hits", "Aciertos de caché", labels=["cache"])
+        misses = CounterMetricFamily("cache_misses", "Fallos de caché", labels=["cache"])
+        size = GaugeMetricFamily("cache_entries", "Entradas en caché", labels=["cache"])
+        for name, stats in caches.items():
+            hits.add_metric([name], stats["hits"])
+            misses.add_metric([name], stats["misses"])
+            size.add_metric([name], stats["size"])
+        yield hits
+        yield misses
+        yield size
+
+
+REGISTRY.register(_DBPoolCollector())
+REGISTRY.register(_CacheCollector())
+
+
+def route_label(scope) -> str:
+    # plantilla de la ruta (/api/v1/products/{product_id}), nunca el path crudo
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
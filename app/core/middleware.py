@@ -1,61 +1,225 @@
 import time
 import uuid
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
-from typing import Callable, Awaitable
-from fastapi import status
+from typing import Any, Sequence
+
+from fastapi import Request, status
+from loguru import logger
 from fastapi.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import IN_FLIGHT, LATENCY, REQUESTS, route_label
+from app.core.rate_limit import (
+    MemoryBackend,
+    RateLimit,
+    RateLimitBackend,
+    RedisBackend,
+    retry_after_header,
+)
+from app.db.session import PRIMARY_UNTIL_HEADER, ReadSessionLocal, primary_until
+from app.security.auth import peek_cached_user
+
+
+class Stage:
+    """Paso del pipeline ASGI.
+
+    ``on_request`` puede cortar el request devolviendo una app ASGI
+    (por ejemplo una ``JSONResponse``) que se envía en lugar de la ruta.
+    """
+
+    async def on_request(self, scope: Scope, ctx: dict[str, Any]) -> ASGIApp | None:
+        return None
 
-# rate limit muy simple en memoria (para demo)
-_request_counter: dict[str, int] = {}
-WINDOW_SECONDS = 60
-MAX_REQUESTS_PER_IP = 300
+    def on_response_start(self, message: Message, ctx: dict[str, Any]) -> None:
+        pass
 
+    def on_complete(self, scope: Scope, ctx: dict[str, Any]) -> None:
+        pass
 
-class RequestIdMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
+
+class RequestIdStage(Stage):
+    async def on_request(self, scope, ctx):
         request_id = str(uuid.uuid4())
-        request.state.request_id = request_id
-        response = await call_next(request)
-        response.headers["X-Request-ID"] = request_id
-        return response
-
-
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
-        start = time.perf_counter()
-        response = await call_next(request)
-        duration = (time.perf_counter() - start) * 1000
-        method = request.method
-        path = request.url.path
-        status_code = response.status_code
-        # aquí podrías mandar a Prometheus, Loki, etc.
-        print(f"{method} {path} -> {status_code} [{duration:.2f} ms]")
-        return response
-
-
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app: ASGIApp):
-        super().__init__(app)
-        self.window_start = time.time()
-
-    async def dispatch(self, request: Request, call_next):
-        global _request_counter
-        now = time.time()
-
-        # reseteo de ventana
-        if now - self.window_start > WINDOW_SECONDS:
-            _request_counter = {}
-            self.window_start = now
-
-        ip = request.client.host if request.client else "unknown"
-        _request_counter[ip] = _request_counter.get(ip, 0) + 1
-
-        if _request_counter[ip] > MAX_REQUESTS_PER_IP:
-            return JSONResponse(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                content={"detail": "Too many requests"},
-            )
-
-        return await call_next(request)
+        ctx["request_id"] = request_id
+        # visible como request.state.request_id
+        scope.setdefault("state", {})["request_id"] = request_id
+        return None
+
+    def on_response_start(self, message, ctx):
+        MutableHeaders(scope=message).append("X-Request-ID", ctx["request_id"])
+
+
+class LoggingStage(Stage):
+    async def on_request(self, scope, ctx):
+        ctx["start"] = time.perf_counter()
+        return None
+
+    def on_response_start(self, message, ctx):
+        ctx["status_code"] = message["status"]
+
+    def on_complete(self, scope, ctx):
+        duration = (time.perf_counter() - ctx["start"]) * 1000
+        method = scope["method"]
+        path = scope["path"]
+        status_code = ctx.get("status_code", 500)
+        # loguru con enqueue=True: no bloquea el request
+        logger.bind(
+            request_id=ctx.get("request_id"),
+            method=method,
+            path=path,
+            status=status_code,
+            duration_ms=round(duration, 2),
+        ).info(f"{method} {path} -> {status_code} [{duration:.2f} ms]")
+
+
+class MetricsStage(Stage):
+    async def on_request(self, scope, ctx):
+        ctx["metrics_start"] = time.perf_counter()
+        IN_FLIGHT.inc()
+        return None
+
+    def on_response_start(self, message, ctx):
+        ctx["status_code"] = message["status"]
+
+    def on_complete(self, scope, ctx):
+        IN_FLIGHT.dec()
+        route = route_label(scope)
+        method = scope["method"]
+        status_class = f"{ctx.get('status_code', 500) // 100}xx"
+        REQUESTS.labels(method, route, status_class).inc()
+        LATENCY.labels(method, route).observe(time.perf_counter() - ctx["metrics_start"])
+
+
+class RateLimitStage(Stage):
+    """Token buckets por IP y por usuario, con límites por ruta.
+
+    Las reglas de ``RATE_LIMIT_ROUTES`` son ``"METHOD /prefijo"`` (o solo
+    ``"/prefijo"``) -> ``"N/unidad"``; gana el prefijo más largo.
+    """
+
+    def __init__(
+        self,
+        backend: RateLimitBackend | None = None,
+        per_ip: str | None = None,
+        per_user: str | None = None,
+        routes: dict[str, str] | None = None,
+    ):
+        self.backend = backend or _build_backend()
+        self.per_ip = RateLimit.parse(per_ip or settings.RATE_LIMIT_PER_IP)
+        self.per_user = RateLimit.parse(per_user or settings.RATE_LIMIT_PER_USER)
+
+        self.routes: list[tuple[str | None, str, str, RateLimit]] = []
+        for rule, limit in (settings.RATE_LIMIT_ROUTES if routes is None else routes).items():
+            method, _, prefix = rule.strip().rpartition(" ")
+            self.routes.append((method.upper() or None, prefix, rule, RateLimit.parse(limit)))
+        self.routes.sort(key=lambda r: len(r[1]), reverse=True)
+
+    def _rule_for(self, scope: Scope) -> tuple[str, RateLimit | None]:
+        for method, prefix, name, limit in self.routes:
+            if scope["path"].startswith(prefix) and method in (None, scope["method"]):
+                return name, limit
+        return "default", None
+
+    async def on_request(self, scope, ctx):
+        rule, route_limit = self._rule_for(scope)
+        client = scope.get("client")
+        ip = client[0] if client else "unknown"
+
+        checks = [(f"ip:{ip}:{rule}", route_limit or self.per_ip)]
+        user = peek_cached_user(Request(scope))
+        if user is not None:
+            checks.append((f"user:{user.sub}:{rule}", route_limit or self.per_user))
+
+        for key, limit in checks:
+            try:
+                allowed, retry_after = await self.backend.acquire(key, limit)
+            except Exception as e:
+                # si el backend compartido cae, no tumbamos la API
+                logger.warning(f"Rate limit no disponible: {e}")
+                return None
+            if not allowed:
+                return JSONResponse(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    content={"detail": "Too many requests"},
+                    headers={"Retry-After": retry_after_header(retry_after)},
+                )
+        return None
+
+
+class ReadYourWritesStage(Stage):
+    """Tras una escritura exitosa, marca al cliente para leer del primario.
+
+    Se envía cookie y header ``X-DB-Primary-Until`` (epoch); los clientes sin
+    cookies pueden reenviar el header. Sin réplica configurada no hace nada;
+    los endpoints marcados con ``read_only`` (POST de consulta) tampoco.
+    """
+
+    _SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+    async def on_request(self, scope, ctx):
+        # el router completa scope["endpoint"] antes de que empiece la respuesta
+        ctx["scope"] = scope
+        return None
+
+    def on_response_start(self, message, ctx):
+        scope = ctx["scope"]
+        if ReadSessionLocal is None or scope["method"] in self._SAFE_METHODS:
+            return
+        if getattr(scope.get("endpoint"), "read_only", False):
+            return
+        if message["status"] >= 400:
+            return
+        until = primary_until()
+        headers = MutableHeaders(scope=message)
+        headers.append(PRIMARY_UNTIL_HEADER, str(until))
+        headers.append(
+            "Set-Cookie",
+            f"{settings.READ_YOUR_WRITES_COOKIE}={until}; "
+            f"Max-Age={settings.READ_YOUR_WRITES_SECONDS}; Path=/; HttpOnly; SameSite=Lax",
+        )
+
+
+def _build_backend() -> RateLimitBackend:
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisBackend(settings.RATE_LIMIT_REDIS_URL)
+    return MemoryBackend(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+
+
+class MiddlewarePipeline:
+    """Middleware ASGI puro que ejecuta varios ``Stage`` en una sola capa.
+
+    A diferencia de ``BaseHTTPMiddleware`` no crea tareas ni streams extra
+    por request y no rompe las respuestas en streaming.
+    """
+
+    def __init__(self, app: ASGIApp, stages: Sequence[Stage] = ()):
+        self.app = app
+        self.stages = list(stages)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        ctx: dict[str, Any] = {}
+        started: list[Stage] = []
+        app = self.app
+        for stage in self.stages:
+            started.append(stage)
+            response = await stage.on_request(scope, ctx)
+            if response is not None:
+                app = response
+                break
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                for stage in started:
+                    stage.on_response_start(message, ctx)
+            await send(message)
+
+        try:
+            await app(scope, receive, send_wrapper)
+        finally:
+            for stage in started:
+                stage.on_complete(scope, ctx)
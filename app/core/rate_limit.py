@@ -0,0 +1,108 @@
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Protocol
+
+_UNITS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Token bucket: ``capacity`` requests de ráfaga, recargando ``capacity`` cada ``period`` s."""
+
+    capacity: int
+    period: float
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / self.period
+
+    @classmethod
+    def parse(cls, value: str) -> "RateLimit":
+        # "300/minute", "10/second", "1000/hour"
+        amount, _, unit = value.partition("/")
+        unit = unit.strip().rstrip("s")
+        if unit not in _UNITS:
+            raise ValueError(f"Límite inválido: {value!r}")
+        return cls(capacity=int(amount), period=_UNITS[unit])
+
+
+class RateLimitBackend(Protocol):
+    async def acquire(self, key: str, limit: RateLimit) -> tuple[bool, float]:
+        """Consume un token. Devuelve (permitido, segundos hasta el próximo token)."""
+        ...
+
+
+class MemoryBackend:
+    """Buckets por proceso, acotados con desalojo LRU."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def acquire(self, key: str, limit: RateLimit) -> tuple[bool, float]:
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (limit.capacity, now))
+        tokens = min(limit.capacity, tokens + (now - updated) * limit.rate)
+
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            # la clave menos usada recientemente se pierde (vuelve con bucket lleno)
+            self._buckets.popitem(last=False)
+
+        return allowed, 0.0 if allowed else (1 - tokens) / limit.rate
+
+
+# token bucket atómico en Redis (o cualquier servidor compatible)
+_TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or capacity
+local ts = tonumber(data[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+  allowed = 1
+else
+  retry = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return {allowed, tostring(retry)}
+"""
+
+
+class RedisBackend:
+    """Estado compartido entre workers/instancias (Redis, Valkey, KeyDB...)."""
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        try:
+            from redis.asyncio import Redis
+        except ImportError as e:  # dependencia opcional
+            raise RuntimeError(
+                "RATE_LIMIT_BACKEND=redis requiere el paquete 'redis'"
+            ) from e
+
+        self.prefix = prefix
+        self._redis = Redis.from_url(url)
+        self._script = self._redis.register_script(_TOKEN_BUCKET_LUA)
+
+    async def acquire(self, key: str, limit: RateLimit) -> tuple[bool, float]:
+        allowed, retry = await self._script(
+            keys=[self.prefix + key],
+            args=[limit.capacity, limit.rate, time.time()],
+        )
+        return bool(allowed), float(retry)
+
+
+def retry_after_header(seconds: float) -> str:
+    return str(max(1, math.ceil(seconds)))
@@ -1,10 +1,30 @@
 # app/core/supabase_client.py
-from supabase import create_client, Client
+import asyncio
+from typing import Awaitable, Callable, TypeVar
+
+import httpx
+from loguru import logger
+from supabase import (
+    create_client,
+    Client,
+    acreate_client,
+    AsyncClient,
+    AsyncClientOptions,
+)
 from app.core.config import settings
 
+T = TypeVar("T")
+
 _supabase: Client | None = None
 
+# cliente async compartido (auth / admin) sobre un pool HTTP acotado
+_async_supabase: AsyncClient | None = None
+_http_client: httpx.AsyncClient | None = None
+_semaphore: asyncio.Semaphore | None = None
+
+
 def get_supabase_client() -> Client:
+    # cliente síncrono: solo para scripts/tareas fuera del request
     global _supabase
     if _supabase is None:
         _supabase = create_client(
@@ -12,3 +32,60 @@ def get_supabase_client() -> Client:
             settings.SUPABASE_SERVICE_ROLE_KEY,
         )
     return _supabase
+
+
+async def init_async_supabase_client() -> AsyncClient:
+    global _async_supabase, _http_client, _semaphore
+    if _async_supabase is not None:
+        return _async_supabase
+
+    _http_client = httpx.AsyncClient(
+        timeout=settings.SUPABASE_HTTP_TIMEOUT_SECONDS,
+        limits=httpx.Limits(
+            max_connections=settings.SUPABASE_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.SUPABASE_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.SUPABASE_HTTP_KEEPALIVE_EXPIRY,
+        ),
+    )
+    _semaphore = asyncio.Semaphore(settings.SUPABASE_MAX_CONCURRENCY)
+    _async_supabase = await acreate_client(
+        settings.SUPABASE_URL,
+        settings.SUPABASE_SERVICE_ROLE_KEY,
+        options=AsyncClientOptions(
+            httpx_client=_http_client,
+            auto_refresh_token=False,
+            persist_session=False,
+        ),
+    )
+    return _async_supabase
+
+
+async def warm_async_supabase_client() -> None:
+    # abre la primera conexión (TLS + keep-alive) antes del primer request
+    await init_async_supabase_client()
+    try:
+        await _http_client.get(
+            f"{settings.SUPABASE_URL}/auth/v1/health",
+            headers={"apikey": settings.SUPABASE_SERVICE_ROLE_KEY},
+        )
+    except httpx.HTTPError as e:
+        logger.warning(f"No se pudo precalentar el cliente de Supabase: {e}")
+
+
+async def close_async_supabase_client() -> None:
+    global _async_supabase, _http_client, _semaphore
+    if _http_client is not None:
+        await _http_client.aclose()
+    _async_supabase = None
+    _http_client = None
+    _semaphore = None
+
+
+async def call_supabase(fn: Callable[[AsyncClient], Awaitable[T]]) -> T:
+    # límite de concurrencia + timeout por llamada
+    client = await init_async_supabase_client()
+    async with _semaphore:
+        return await asyncio.wait_for(
+            fn(client),
+            timeout=settings.SUPABASE_HTTP_TIMEOUT_SECONDS,
+        )
@@ -0,0 +1,55 @@
+import time
+from dataclasses import asdict, dataclass
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+@dataclass
+class PoolWaitStats:
+    checkouts: int = 0
+    wait_seconds_total: float = 0.0
+    max_wait_seconds: float = 0.0
+    timeouts: int = 0
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """QueuePool async que mide cuánto espera cada checkout por una conexión."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.wait_stats.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.wait_stats.checkouts += 1
+            self.wait_stats.wait_seconds_total += waited
+            self.wait_stats.max_wait_seconds = max(self.wait_stats.max_wait_seconds, waited)
+
+    def recreate(self):
+        # dispose()/invalidación recrean el pool: conservar las estadísticas
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+
+def pool_stats(engine: AsyncEngine) -> dict:
+    pool = engine.pool
+    stats = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+    }
+    wait_stats = getattr(pool, "wait_stats", None)
+    if wait_stats is not None:
+        stats.update(asdict(wait_stats))
+    return stats
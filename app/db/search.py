@@ -0,0 +1,50 @@
+import re
+
+from sqlalchemy import Float, func, literal_column, or_
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+from app.models.product_models import Producto
+
+SEARCH_MODES = ("ilike", "fulltext")
+
+# debe coincidir con migrations/001_product_search.sql
+TS_CONFIG = "simple"
+
+# columna generada en la BD; no se mapea en el modelo para que los SELECT
+# normales sigan funcionando aunque la migración no esté aplicada
+search_vector = literal_column("productos.search_vector", type_=TSVECTOR)
+
+
+def _prefix_tsquery(term: str) -> str | None:
+    # "lap neg" -> "lap:* & neg:*"
+    tokens = re.findall(r"\w+", term.lower())
+    if not tokens:
+        return None
+    return " & ".join(f"{token}:*" for token in tokens)
+
+
+def ilike_clause(term: str):
+    like = f"%{term}%"
+    return (
+        (Producto.nombre.ilike(like))
+        | (Producto.descripcion.ilike(like))
+        | (Producto.codigo_sku.ilike(like))
+    )
+
+
+def fulltext_clause(term: str):
+    """Devuelve (filtro, rank) usando tsvector + pg_trgm."""
+    query = _prefix_tsquery(term)
+    similarity = func.similarity(Producto.nombre, term, type_=Float)
+    conditions = [
+        Producto.codigo_sku.ilike(f"%{term}%"),
+        Producto.nombre.op("%")(term),
+    ]
+    rank = similarity
+
+    if query:
+        tsquery = func.to_tsquery(literal_column(f"'{TS_CONFIG}'::regconfig"), query)
+        conditions.insert(0, search_vector.op("@@")(tsquery))
+        rank = func.ts_rank_cd(search_vector, tsquery, type_=Float) + similarity
+
+    return or_(*conditions), rank
@@ -1,21 +1,109 @@
+import time
+from uuid import uuid4
+
+from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.db.pool import InstrumentedAsyncQueuePool
+
+# header con el que clientes sin cookies indican su ventana read-your-writes
+PRIMARY_UNTIL_HEADER = "X-DB-Primary-Until"
+
+
+def _async_url(url: str) -> str:
+    return url.replace("postgresql://", "postgresql+asyncpg://")
+
+
+db_url = _async_url(settings.DATABASE_URL)
+
+
+def _engine_options() -> dict:
+    if settings.DB_PGBOUNCER_MODE:
+        # PgBouncer en modo transacción: sin prepared statements reutilizados
+        # y con nombres únicos para evitar DuplicatePreparedStatementError
+        connect_args = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    else:
+        connect_args = {
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        }
+
+    return dict(
+        echo=False,
+        future=True,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
+
+
+def _session_factory(bind) -> sessionmaker:
+    return sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        bind=bind,
+        expire_on_commit=False,
+        class_=AsyncSession,
+    )
 
-db_url = settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
 
-engine = create_async_engine(db_url, echo=False, future=True)
+engine = create_async_engine(db_url, **_engine_options())
+AsyncSessionLocal = _session_factory(engine)
 
-AsyncSessionLocal = sessionmaker(
-    autocommit=False,
-    autoflush=False,
-    bind=engine,
-    expire_on_commit=False,
-    class_=AsyncSession,
+# réplica: solo si DATABASE_READ_URL está configurada
+read_engine = (
+    create_async_engine(_async_url(settings.DATABASE_READ_URL), **_engine_options())
+    if settings.DATABASE_READ_URL
+    else None
 )
+ReadSessionLocal = _session_factory(read_engine) if read_engine is not None else None
+
+
+def primary_until() -> int:
+    return int(time.time()) + settings.READ_YOUR_WRITES_SECONDS
+
+
+def read_only(endpoint):
+    # POST que solo lee (batch-get): no fija al cliente en el primario
+    endpoint.read_only = True
+    return endpoint
+
+
+def wants_primary(request: Request) -> bool:
+    value = request.headers.get(PRIMARY_UNTIL_HEADER) or request.cookies.get(
+        settings.READ_YOUR_WRITES_COOKIE
+    )
+    try:
+        until = float(value)
+    except (TypeError, ValueError):
+        return False
+    now = time.time()
+    # el cliente no puede quedarse en el primario más allá de la ventana
+    return now < until <= now + settings.READ_YOUR_WRITES_SECONDS
+
+
+def read_session_factory(request: Request) -> sessionmaker:
+    if ReadSessionLocal is None or wants_primary(request):
+        return AsyncSessionLocal
+    return ReadSessionLocal
 
 
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
+
+
+async def get_read_db(request: Request):
+    # lecturas: réplica, salvo dentro de la ventana read-your-writes
+    async with read_session_factory(request)() as session:
+        yield session
@@ -1,8 +1,27 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from loguru import logger
 
+from app.api.deps import get_authenticated_user
 from app.core.config import settings
-from app.core.middleware import RequestIdMiddleware, LoggingMiddleware, RateLimitMiddleware
+from app.core.logging import setup_logging
+from app.core.middleware import (
+    MiddlewarePipeline,
+    RequestIdStage,
+    MetricsStage,
+    LoggingStage,
+    RateLimitStage,
+    ReadYourWritesStage,
+)
+from app.core.supabase_client import (
+    warm_async_supabase_client,
+    close_async_supabase_client,
+)
+from app.services.outbox import build_dispatcher
+from app.security.auth import close_jwks_client
 
 # Importar todos los routers del microservicio
 from app.api.routes import (
@@ -10,14 +29,36 @@ from app.api.routes import (
     suppliers,
     categories,
     units,
-    product_attributes
+    product_attributes,
+    monitoring,
 )
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # startup
+    await warm_async_supabase_client()
+    dispatcher = build_dispatcher()
+    if dispatcher is not None:
+        dispatcher.start()
+    yield
+    # shutdown
+    if dispatcher is not None:
+        await dispatcher.stop()
+    await close_async_supabase_client()
+    await close_jwks_client()
+    await logger.complete()
+
+
 def create_app() -> FastAPI:
+    setup_logging()
+
     app = FastAPI(
         title="product-service",
-        version="1.0.0"
+        version="1.0.0",
+        lifespan=lifespan,
+        # orjson para las respuestas que siguen pasando por response_model
+        default_response_class=ORJSONResponse,
     )
 
     # CORS
@@ -27,12 +68,20 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Request-ID", "X-Next-Cursor", "X-DB-Primary-Until", "ETag"],
     )
 
-    # Middlewares
-    app.add_middleware(RequestIdMiddleware)
-    app.add_middleware(LoggingMiddleware)
-    app.add_middleware(RateLimitMiddleware)
+    # Middlewares (una sola capa ASGI pura)
+    app.add_middleware(
+        MiddlewarePipeline,
+        stages=[
+            RequestIdStage(),
+            MetricsStage(),
+            LoggingStage(),
+            RateLimitStage(),
+            ReadYourWritesStage(),
+        ],
+    )
 
     # Rutas principales
     app.include_router(products.router, prefix=settings.API_V1_STR)
@@ -40,6 +89,9 @@ def create_app() -> FastAPI:
     app.include_router(categories.router, prefix=settings.API_V1_STR)
     app.include_router(units.router, prefix=settings.API_V1_STR)
     app.include_router(product_attributes.router, prefix=settings.API_V1_STR)
+    # métricas y estado interno: no públicos salvo MONITORING_PUBLIC
+    monitoring_deps = [] if settings.MONITORING_PUBLIC else [Depends(get_authenticated_user)]
+    app.include_router(monitoring.router, dependencies=monitoring_deps)
 
     @app.get("/health")
     async def health():
@@ -7,6 +7,9 @@ from sqlalchemy import (
     Table,
     DateTime,
     Numeric,
+    Index,
+    BigInteger,
+    func,
 )
 from sqlalchemy.orm import relationship, declarative_base
 from datetime import datetime
@@ -19,6 +22,8 @@ categorias_productos = Table(
     Base.metadata,
     Column("categorias_categoria", Integer, ForeignKey("categorias.id_categoria"), primary_key=True),
     Column("productos_producto", Integer, ForeignKey("productos.id_producto"), primary_key=True),
+    # categorías de un producto (la PK empieza por categoría): migrations/006
+    Index("ix_categorias_productos_producto", "productos_producto", "categorias_categoria"),
 )
 
 
@@ -36,6 +41,10 @@ class Proveedor(Base):
 
     productos = relationship("Producto", back_populates="proveedor")
 
+    __table_args__ = (
+        Index("ix_proveedores_empresa_estado_id", "empresas_id_emp", "estado", "id_proveedor"),
+    )
+
 
 class UnidadMedida(Base):
     __tablename__ = "unidades_medida"
@@ -94,6 +103,11 @@ class Producto(Base):
         cascade="all, delete-orphan",
     )
 
+    __table_args__ = (
+        # listados acotados por empresa: (empresa, estado) y orden por id
+        Index("ix_productos_empresa_estado_id", "empresas_id_empresa", "estado", "id_producto"),
+    )
+
 
 class ProductoAtributo(Base):
     __tablename__ = "productos_atributos"
@@ -104,3 +118,35 @@ class ProductoAtributo(Base):
     productos_id_prod = Column(Integer, ForeignKey("productos.id_producto"))
 
     producto = relationship("Producto", back_populates="atributos")
+
+    __table_args__ = (
+        # filtros attr.<nombre>=<valor>: index-only scan (migrations/002)
+        Index("ix_productos_atributos_nombre_valor_prod", "nombre_atributo", "valor", "productos_id_prod"),
+        # atributos de un producto (carga de respuestas, reemplazo)
+        Index("ix_productos_atributos_prod", "productos_id_prod"),
+    )
+
+
+# evento de producto, escrito en la misma transacción que el cambio
+class OutboxEvento(Base):
+    __tablename__ = "productos_outbox"
+
+    id_evento = Column(BigInteger, primary_key=True)
+    # sin FK: el evento no depende de que el producto siga existiendo
+    productos_id_prod = Column(Integer, nullable=False)
+    tipo = Column(String(20), nullable=False)  # created | updated | deleted
+    fecha_creacion = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    intentos = Column(Integer, nullable=False, server_default="0")
+    proximo_intento = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    fecha_publicacion = Column(DateTime(timezone=True))
+    ultimo_error = Column(String(500))
+
+    __table_args__ = (
+        # pendientes en orden: el índice solo guarda los no publicados
+        Index(
+            "ix_productos_outbox_pendientes",
+            "proximo_intento",
+            "id_evento",
+            postgresql_where=fecha_publicacion.is_(None),
+        ),
+    )
@@ -124,3 +124,82 @@ class ProductoRead(ProductoBase):
 
     class Config:
         from_attributes = True
+
+
+class ProductoSummary(BaseModel):
+    # vista liviana para grillas (view=summary)
+    id_producto: int
+    codigo_sku: str
+    nombre: str
+    precio: Decimal
+    estado: bool = True
+
+
+# ---------- Carga masiva ----------
+
+class BulkImportRowResult(BaseModel):
+    row: int
+    codigo_sku: Optional[str] = None
+    ok: bool
+    id_producto: Optional[int] = None
+    error: Optional[str] = None
+
+
+class BulkImportReport(BaseModel):
+    total: int
+    created: int
+    failed: int
+    results: List[BulkImportRowResult]
+
+
+# ---------- Consulta por lote ----------
+
+class ProductoBatchGet(BaseModel):
+    ids: List[int] = []
+    codigos_sku: List[str] = []
+
+
+class ProductoBatchResult(BaseModel):
+    productos: List[ProductoRead]
+    missing_ids: List[int] = []
+    missing_skus: List[str] = []
+
+
+# ---------- Feed de cambios ----------
+
+class ProductoCambios(BaseModel):
+    productos: List[ProductoRead]
+    desactivados: List[int] = []
+    next_token: str
+    has_more: bool = False
+
+
+# ---------- Facetas ----------
+
+class FacetaCategoria(BaseModel):
+    id_categoria: int
+    nombre: Optional[str] = None
+    cantidad: int
+
+
+class FacetaProveedor(BaseModel):
+    id_proveedor: int
+    nombre: Optional[str] = None
+    cantidad: int
+
+
+class FacetaValor(BaseModel):
+    valor: str
+    cantidad: int
+
+
+class FacetaAtributo(BaseModel):
+    nombre_atributo: str
+    valores: List[FacetaValor]
+
+
+class ProductoFacetas(BaseModel):
+    total: int
+    categorias: List[FacetaCategoria] = []
+    proveedores: List[FacetaProveedor] = []
+    atributos: List[FacetaAtributo] = []
@@ -1,13 +1,47 @@
 # app/api/deps.py (o donde lo tengas)
+import asyncio
+import hashlib
+import time
+
+import httpx
 from fastapi import HTTPException, Depends, status, Request
-from supabase import Client
+from jose import jwt, JWTError, ExpiredSignatureError
+from app.core.cache import TTLCache
 from app.core.config import settings
-from app.core.supabase_client import get_supabase_client
+from app.core.supabase_client import call_supabase
 
 
 class CurrentUser:
-    def __init__(self, sub: str):
+    def __init__(self, sub: str, claims: dict | None = None):
         self.sub = sub  # id del usuario en Supabase (UUID string)
+        self.claims = claims or {}
+
+    @property
+    def empresa_id(self) -> int | None:
+        # empresa del usuario: claim app_metadata.empresa_id del JWT
+        value = (self.claims.get("app_metadata") or {}).get("empresa_id")
+        try:
+            return int(value) if value is not None else None
+        except (TypeError, ValueError):
+            return None
+
+
+# claims verificados, indexados por hash del token (nunca el token en claro)
+_token_cache = TTLCache(
+    maxsize=settings.AUTH_TOKEN_CACHE_SIZE,
+    ttl=settings.AUTH_TOKEN_CACHE_TTL_SECONDS,
+)
+
+# llaves públicas del JWKS (kid -> jwk)
+_jwks_cache = TTLCache(maxsize=1, ttl=settings.JWT_JWKS_TTL_SECONDS)
+# kids que no estaban ni en un JWKS recién recargado: 401 sin volver a buscar
+_unknown_kids = TTLCache(
+    maxsize=settings.AUTH_TOKEN_CACHE_SIZE,
+    ttl=settings.JWT_JWKS_MIN_REFRESH_SECONDS,
+)
+_jwks_lock = asyncio.Lock()
+_jwks_fetched_at = float("-inf")
+_jwks_client: httpx.AsyncClient | None = None
 
 
 def _get_token_from_cookie_or_header(request: Request) -> str | None:
@@ -24,31 +58,180 @@ def _get_token_from_cookie_or_header(request: Request) -> str | None:
     return None
 
 
-async def get_current_user(request: Request) -> CurrentUser:
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def peek_cached_user(request: Request) -> CurrentUser | None:
+    # usuario ya verificado para este token, sin validar nada nuevo
     token = _get_token_from_cookie_or_header(request)
     if not token:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="No autenticado (sin token)",
-        )
+        return None
+    return _token_cache.peek(_token_key(token))
+
+
+def token_cache_stats() -> dict[str, int]:
+    return _token_cache.stats()
+
+
+def _cache_user(key: str, user: CurrentUser, exp: int | None) -> None:
+    ttl = settings.AUTH_TOKEN_CACHE_TTL_SECONDS
+    if exp is not None:
+        # nunca cachear más allá de la expiración del token
+        ttl = min(ttl, exp - time.time())
+    _token_cache.set(key, user, ttl=ttl)
+
+
+class LocalKeyUnavailable(JWTError):
+    # no hay llave local para ningún token (sin secreto o JWKS caído): el
+    # único caso en que se permite consultar a Supabase
+    pass
+
+
+def _jwks_http() -> httpx.AsyncClient:
+    # un solo cliente (pool + keep-alive) para todas las recargas
+    global _jwks_client
+    if _jwks_client is None:
+        _jwks_client = httpx.AsyncClient(timeout=5)
+    return _jwks_client
+
+
+async def close_jwks_client() -> None:
+    global _jwks_client
+    if _jwks_client is not None:
+        await _jwks_client.aclose()
+    _jwks_client = None
+
+
+async def _fetch_jwks(force: bool = False) -> dict[str, dict]:
+    global _jwks_fetched_at
+    keys = _jwks_cache.get("keys")
+    if keys is not None and not force:
+        return keys
+    async with _jwks_lock:
+        # un solo fetch a la vez; la recarga forzada respeta el intervalo
+        # mínimo (tokens con kids inventados no se traducen en fetches)
+        keys = _jwks_cache.get("keys")
+        recent = time.monotonic() - _jwks_fetched_at < settings.JWT_JWKS_MIN_REFRESH_SECONDS
+        if recent:
+            if keys is None:
+                raise LocalKeyUnavailable("JWKS no disponible")
+            return keys
+        if keys is not None and not force:
+            return keys
+        _jwks_fetched_at = time.monotonic()
+        response = await _jwks_http().get(settings.JWT_JWKS_URL)
+        response.raise_for_status()
+        keys = {k["kid"]: k for k in response.json().get("keys", []) if "kid" in k}
+        _jwks_cache.set("keys", keys)
+    return keys
 
-    supabase: Client = get_supabase_client()
 
+async def _get_signing_key(token: str):
+    if not settings.JWT_JWKS_URL:
+        if not settings.JWT_SECRET:
+            raise LocalKeyUnavailable("sin JWT_SECRET ni JWT_JWKS_URL")
+        return settings.JWT_SECRET
+
+    kid = jwt.get_unverified_header(token).get("kid")
+    if _unknown_kids.get(kid) is not None:
+        raise JWTError("kid desconocido")
+    keys = await _fetch_jwks()
+    if kid not in keys:
+        # posible rotación de llaves: se recarga (como mucho una vez por intervalo)
+        keys = await _fetch_jwks(force=True)
+    if kid not in keys:
+        # kid inventado o ya retirado: 401, sin Supabase
+        _unknown_kids.set(kid, True)
+        raise JWTError("kid desconocido")
+    return keys[kid]
+
+
+async def _verify_locally(token: str) -> dict:
+    key = await _get_signing_key(token)
+    return jwt.decode(
+        token,
+        key,
+        algorithms=settings.JWT_ALGORITHMS,
+        audience=settings.JWT_AUDIENCE,
+        options={"verify_aud": settings.JWT_AUDIENCE is not None},
+    )
+
+
+async def _verify_remotely(token: str) -> CurrentUser:
     try:
-        user_response = supabase.auth.get_user(token)
+        user_response = await call_supabase(lambda client: client.auth.get_user(token))
         if not user_response or not user_response.user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Token inválido (Supabase no devolvió user)",
             )
 
-        user_id = user_response.user.id  # UUID string
-        return CurrentUser(sub=user_id)
+        user = user_response.user
+        # mismos claims que el JWT (app_metadata.empresa_id incluido): la
+        # empresa se resuelve igual en ambos caminos
+        claims = {
+            "sub": user.id,  # UUID string
+            "role": user.role,
+            "aud": user.aud,
+            "email": user.email,
+            "app_metadata": user.app_metadata or {},
+            "user_metadata": user.user_metadata or {},
+        }
+        return CurrentUser(sub=user.id, claims=claims)
 
     except HTTPException:
         raise
+    except (asyncio.TimeoutError, httpx.TransportError):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Supabase no respondió a tiempo",
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"No se pudo validar el token en Supabase: {str(e)}",
         )
+
+
+async def get_current_user(request: Request) -> CurrentUser:
+    token = _get_token_from_cookie_or_header(request)
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="No autenticado (sin token)",
+        )
+
+    key = _token_key(token)
+    cached = _token_cache.get(key)
+    if cached is not None:
+        return cached
+
+    if settings.AUTH_VERIFY_MODE == "local":
+        try:
+            claims = await _verify_locally(token)
+            user = CurrentUser(sub=claims["sub"], claims=claims)
+            _cache_user(key, user, claims.get("exp"))
+            return user
+        except ExpiredSignatureError:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token expirado",
+            )
+        except (JWTError, KeyError, httpx.HTTPError) as e:
+            # firma inválida o token basura: 401 sin tocar a Supabase (si no,
+            # cualquiera podría amplificar carga contra el proveedor de auth)
+            unavailable = isinstance(e, (LocalKeyUnavailable, httpx.HTTPError))
+            if not (settings.AUTH_REMOTE_FALLBACK and unavailable):
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail=f"Token inválido: {str(e)}",
+                )
+
+    user = await _verify_remotely(token)
+    try:
+        exp = jwt.get_unverified_claims(token).get("exp")
+    except JWTError:
+        exp = None
+    _cache_user(key, user, exp)
+    return user
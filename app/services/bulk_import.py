@@ -0,0 +1,244 @@
+import csv
+import json
+from typing import Any, AsyncIterator, Sequence
+
+from pydantic import ValidationError
+from sqlalchemy import Table, insert, select
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.product_models import Producto, ProductoAtributo, categorias_productos
+from app.schemas.product_schemas import BulkImportRowResult, ProductoCreate
+from app.services.outbox import add_events
+from app.services.reference_data import (
+    categorias_cache,
+    proveedores_cache,
+    unidades_cache,
+)
+
+# columnas de Producto que vienen tal cual en ProductoCreate
+_PRODUCT_FIELDS = [
+    c.key for c in Producto.__table__.columns if c.key in ProductoCreate.model_fields
+]
+
+
+async def _iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    buffer = b""
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8-sig").rstrip("\r")
+
+
+async def iter_ndjson(stream: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    async for line in _iter_lines(stream):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ValueError(f"JSON inválido: {e}")
+
+
+def _csv_record(header: list[str], values: list[str]) -> dict:
+    # categorias_ids: "1|2" ; atributos: "Color:Negro|RAM:16GB"
+    data: dict[str, Any] = {}
+    for key, value in zip(header, values):
+        value = value.strip()
+        if value == "":
+            continue
+        if key == "categorias_ids":
+            data[key] = [v for v in value.split("|") if v]
+        elif key == "atributos":
+            data[key] = [
+                {"nombre_atributo": n, "valor": v or None}
+                for n, _, v in (pair.partition(":") for pair in value.split("|") if pair)
+            ]
+        else:
+            data[key] = value
+    return data
+
+
+async def iter_csv(stream: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    header: list[str] | None = None
+    pending = ""
+    async for line in _iter_lines(stream):
+        # un campo entre comillas puede contener saltos de línea
+        pending = f"{pending}\n{line}" if pending else line
+        if pending.count('"') % 2:
+            continue
+        record, pending = pending, ""
+        if not record.strip():
+            continue
+
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [h.strip() for h in values]
+            continue
+        yield _csv_record(header, values)
+
+
+async def _copy_or_insert(
+    db: AsyncSession, table: Table, columns: list[str], records: list[tuple]
+) -> None:
+    if not records:
+        return
+
+    if settings.BULK_IMPORT_USE_COPY:
+        conn = await db.connection()
+        raw = await conn.get_raw_connection()
+        driver = raw.driver_connection
+        if hasattr(driver, "copy_records_to_table"):
+            # asyncpg: COPY ... FROM STDIN binario, en la misma transacción
+            await driver.copy_records_to_table(
+                table.name, records=records, columns=columns
+            )
+            return
+
+    await db.execute(insert(table), [dict(zip(columns, r)) for r in records])
+
+
+async def _insert_products(
+    db: AsyncSession, items: Sequence[tuple[int, ProductoCreate]]
+) -> dict[str, int]:
+    result = await db.execute(
+        insert(Producto).returning(
+            Producto.id_producto, Producto.codigo_sku, sort_by_parameter_order=True
+        ),
+        [{f: getattr(p, f) for f in _PRODUCT_FIELDS} for _, p in items],
+    )
+    ids = {sku: id_ for id_, sku in result}
+
+    await _copy_or_insert(
+        db,
+        categorias_productos,
+        ["categorias_categoria", "productos_producto"],
+        [
+            (c, ids[p.codigo_sku])
+            for _, p in items
+            for c in dict.fromkeys(p.categorias_ids)
+        ],
+    )
+    await _copy_or_insert(
+        db,
+        ProductoAtributo.__table__,
+        ["nombre_atributo", "valor", "productos_id_prod"],
+        [
+            (a.nombre_atributo, a.valor, ids[p.codigo_sku])
+            for _, p in items
+            for a in p.atributos
+        ],
+    )
+    return ids
+
+
+def _error(row: int, sku: str | None, error: str) -> BulkImportRowResult:
+    return BulkImportRowResult(row=row, codigo_sku=sku, ok=False, error=error)
+
+
+async def import_batch(
+    db: AsyncSession,
+    batch: Sequence[tuple[int, Any]],
+    seen_skus: set[str],
+    empresa_id: int | None = None,
+) -> list[BulkImportRowResult]:
+    results: list[BulkImportRowResult] = []
+    valid: list[tuple[int, ProductoCreate]] = []
+
+    # 1) validación de forma (ProductoCreate)
+    for row, record in batch:
+        if isinstance(record, Exception):
+            results.append(_error(row, None, str(record)))
+            continue
+        try:
+            product = ProductoCreate.model_validate(record)
+        except ValidationError as e:
+            sku = record.get("codigo_sku") if isinstance(record, dict) else None
+            results.append(_error(row, sku, e.errors()[0]["msg"]))
+            continue
+        if empresa_id is not None and product.empresas_id_empresa != empresa_id:
+            results.append(_error(row, product.codigo_sku, "empresa distinta a la del usuario"))
+            continue
+        if product.codigo_sku in seen_skus:
+            results.append(_error(row, product.codigo_sku, "codigo_sku duplicado en el archivo"))
+            continue
+        seen_skus.add(product.codigo_sku)
+        valid.append((row, product))
+
+    if not valid:
+        return results
+
+    # 2) SKUs existentes y referencias, una vez por lote
+    existing = await db.execute(
+        select(Producto.codigo_sku).where(
+            Producto.codigo_sku.in_([p.codigo_sku for _, p in valid])
+        )
+    )
+    existing_skus = set(existing.scalars())
+    # proveedores por empresa: uno de otra empresa cuenta como no encontrado
+    proveedores: set[tuple[int, int]] = set()
+    for empresa in {p.empresas_id_empresa for _, p in valid}:
+        found = await proveedores_cache.get_many(
+            db,
+            (p.proveedores_id_proveedor for _, p in valid if p.empresas_id_empresa == empresa),
+            empresa,
+        )
+        proveedores.update((empresa, id_) for id_ in found)
+    unidades = await unidades_cache.get_many(
+        db, (p.unidades_medida_id_unidad for _, p in valid)
+    )
+    categorias = await categorias_cache.get_many(
+        db, (c for _, p in valid for c in p.categorias_ids)
+    )
+
+    insertable: list[tuple[int, ProductoCreate]] = []
+    for row, p in valid:
+        missing_categories = [c for c in p.categorias_ids if c not in categorias]
+        if p.codigo_sku in existing_skus:
+            results.append(_error(row, p.codigo_sku, "codigo_sku ya existe"))
+        elif (p.empresas_id_empresa, p.proveedores_id_proveedor) not in proveedores:
+            results.append(_error(row, p.codigo_sku, "proveedor no encontrado"))
+        elif p.unidades_medida_id_unidad not in unidades:
+            results.append(_error(row, p.codigo_sku, "unidad de medida no encontrada"))
+        elif missing_categories:
+            results.append(
+                _error(row, p.codigo_sku, f"categorías no encontradas: {missing_categories}")
+            )
+        else:
+            insertable.append((row, p))
+
+    if not insertable:
+        return sorted(results, key=lambda r: r.row)
+
+    # 3) inserción multi-fila; si el lote falla se reintenta fila por fila
+    try:
+        async with db.begin_nested():
+            ids = await _insert_products(db, insertable)
+    except (IntegrityError, DBAPIError):
+        ids = {}
+        for row, p in insertable:
+            try:
+                async with db.begin_nested():
+                    ids.update(await _insert_products(db, [(row, p)]))
+            except (IntegrityError, DBAPIError) as e:
+                results.append(_error(row, p.codigo_sku, str(e.orig.__cause__ or e.orig)))
+
+    await add_events(db, "created", ids.values())
+    await db.commit()
+
+    for row, p in insertable:
+        if p.codigo_sku in ids:
+            results.append(
+                BulkImportRowResult(
+                    row=row,
+                    codigo_sku=p.codigo_sku,
+                    ok=True,
+                    id_producto=ids[p.codigo_sku],
+                )
+            )
+
+    return sorted(results, key=lambda r: r.row)
@@ -0,0 +1,62 @@
+import csv
+import io
+from typing import AsyncIterator
+
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.product_models import Producto
+from app.schemas.product_schemas import ProductoRead
+from app.services.product_filters import ProductFilters
+from app.services.product_reader import PRODUCT_COLUMNS, build_product_reads
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+# mismo formato que acepta POST /products/bulk (text/csv)
+CSV_COLUMNS = PRODUCT_COLUMNS + ["categorias_ids", "atributos"]
+
+
+def _csv_row(product: ProductoRead) -> list:
+    row = [getattr(product, col) for col in PRODUCT_COLUMNS]
+    row.append("|".join(str(c.id_categoria) for c in product.categorias))
+    row.append(
+        "|".join(f"{a.nombre_atributo}:{a.valor or ''}" for a in product.atributos)
+    )
+    return row
+
+
+def _csv_lines(rows: list[list]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+async def stream_products(
+    filters: ProductFilters,
+    fmt: str,
+    session_factory: sessionmaker = AsyncSessionLocal,
+) -> AsyncIterator[str]:
+    chunk_size = settings.EXPORT_CHUNK_SIZE
+    if fmt == "csv":
+        yield _csv_lines([CSV_COLUMNS])
+
+    async with session_factory() as db:
+        # filas de columnas (no entidades ORM): nada queda en el identity map
+        query = (
+            filters.apply(select(*[Producto.__table__.c[c] for c in PRODUCT_COLUMNS]))
+            .order_by(Producto.id_producto)
+            .execution_options(yield_per=chunk_size)
+        )
+        # cursor del lado del servidor: se leen chunk_size filas por vez
+        result = await db.stream(query)
+        async for rows in result.partitions():
+            reads = await build_product_reads(db, rows, filters.empresa_id)
+            if fmt == "csv":
+                yield _csv_lines([_csv_row(p) for p in reads])
+            else:
+                yield "".join(p.model_dump_json() + "\n" for p in reads)
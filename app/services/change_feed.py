@@ -0,0 +1,48 @@
+from sqlalchemy import BigInteger, Text, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.pagination import encode_cursor, paginate
+from app.models.product_models import Producto
+from app.schemas.product_schemas import ProductoCambios
+from app.services.product_reader import PRODUCT_COLUMNS, build_product_reads
+from app.services.product_versions import version
+from app.services.tenancy import product_scope
+
+CHANGES_SORT = "changes"
+_ORDER = [(version, False), (Producto.id_producto, False)]
+
+
+def visible_horizon():
+    # transacción más vieja todavía abierta: todo lo que está por debajo ya
+    # confirmó (o abortó) y nada nuevo puede aparecer con una versión menor
+    return cast(cast(func.pg_snapshot_xmin(func.pg_current_snapshot()), Text), BigInteger)
+
+
+async def read_changes(
+    db: AsyncSession, token: str | None, limit: int, empresa_id: int | None = None
+) -> ProductoCambios:
+    query = select(
+        *[Producto.__table__.c[c] for c in PRODUCT_COLUMNS],
+        version.label("version"),
+    ).where(version < visible_horizon(), *product_scope(empresa_id))
+    # limit + 1: saber si queda otro lote sin una query extra
+    query = paginate(query, _ORDER, CHANGES_SORT, limit + 1, cursor=token)
+    rows = (await db.execute(query)).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    active = [row for row in rows if row.estado]
+    productos = await build_product_reads(db, active, empresa_id) if active else []
+
+    if rows:
+        next_token = encode_cursor(CHANGES_SORT, [rows[-1].version, rows[-1].id_producto])
+    else:
+        # sin cambios: el consumidor vuelve a preguntar desde el mismo punto
+        next_token = token or encode_cursor(CHANGES_SORT, [0, 0])
+
+    return ProductoCambios.model_construct(
+        productos=productos,
+        desactivados=[row.id_producto for row in rows if not row.estado],
+        next_token=next_token,
+        has_more=has_more,
+    )
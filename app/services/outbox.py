@@ -0,0 +1,248 @@
+import asyncio
+import json
+import time
+from typing import Any, Iterable, Protocol
+
+import httpx
+from loguru import logger
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.metrics import OUTBOX_EVENTS
+from app.db.session import AsyncSessionLocal
+from app.models.product_models import OutboxEvento
+
+# cada cuánto se borran los eventos ya publicados
+_PRUNE_INTERVAL_SECONDS = 600
+# 2^20 s ya supera cualquier OUTBOX_RETRY_MAX_SECONDS razonable
+_MAX_BACKOFF_EXPONENT = 20
+
+
+async def add_events(db: AsyncSession, tipo: str, product_ids: Iterable[int]) -> None:
+    # dentro de la transacción del cambio: se confirman (o no) juntos
+    if not settings.OUTBOX_ENABLED:
+        return
+    rows = [{"productos_id_prod": pid, "tipo": tipo} for pid in dict.fromkeys(product_ids)]
+    if rows:
+        await db.execute(insert(OutboxEvento), rows)
+
+
+def coalesce(rows: Iterable[Any]) -> list[dict[str, Any]]:
+    # un evento por producto y lote: created + updated* => created, el último
+    # tipo en cualquier otro caso; id_evento es el del último evento agrupado
+    events: dict[int, dict[str, Any]] = {}
+    for row in sorted(rows, key=lambda r: r.id_evento):
+        event = events.get(row.productos_id_prod)
+        if event is None:
+            events[row.productos_id_prod] = {
+                "id_evento": row.id_evento,
+                "tipo": row.tipo,
+                "id_producto": row.productos_id_prod,
+                "fecha": row.fecha_creacion.isoformat(),
+                "agrupados": 1,
+            }
+            continue
+        if not (event["tipo"] == "created" and row.tipo == "updated"):
+            event["tipo"] = row.tipo
+        event["id_evento"] = row.id_evento
+        event["fecha"] = row.fecha_creacion.isoformat()
+        event["agrupados"] += 1
+    return sorted(events.values(), key=lambda e: e["id_evento"])
+
+
+class OutboxSink(Protocol):
+    async def publish(self, events: list[dict[str, Any]]) -> None: ...
+
+    async def close(self) -> None: ...
+
+
+class WebhookSink:
+    """POST ``{"eventos": [...]}``; cualquier status >= 400 es un fallo."""
+
+    def __init__(self, url: str, timeout: float):
+        self.url = url
+        self._client = httpx.AsyncClient(timeout=timeout)
+
+    async def publish(self, events: list[dict[str, Any]]) -> None:
+        response = await self._client.post(self.url, json={"eventos": events})
+        response.raise_for_status()
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class FileSink:
+    """Agrega los eventos como NDJSON (sustituto local de una cola)."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _write(self, lines: str) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+    async def publish(self, events: list[dict[str, Any]]) -> None:
+        lines = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in events)
+        await asyncio.to_thread(self._write, lines)
+
+    async def close(self) -> None:
+        return None
+
+
+class OutboxDispatcher:
+    """Publica los eventos pendientes del outbox en segundo plano.
+
+    Toma lotes con ``FOR UPDATE SKIP LOCKED`` y un lease (varios workers no se
+    pisan), agrupa los eventos repetidos de un mismo producto y los entrega a
+    todos los sinks. Entrega al menos una vez: si un sink falla se reintenta
+    el lote completo con backoff exponencial.
+    """
+
+    def __init__(
+        self,
+        sinks: list[OutboxSink],
+        session_factory: sessionmaker = AsyncSessionLocal,
+    ):
+        self.sinks = sinks
+        self.session_factory = session_factory
+        self._task: asyncio.Task | None = None
+        self._stopping = asyncio.Event()
+        self._last_prune = 0.0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        for sink in self.sinks:
+            await sink.close()
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                claimed = await self.dispatch_once()
+                if time.monotonic() - self._last_prune > _PRUNE_INTERVAL_SECONDS:
+                    await self.prune()
+            except Exception as e:
+                # BD caída, migración sin aplicar...: se reintenta en el próximo ciclo
+                logger.warning(f"Outbox: error despachando eventos: {e}")
+                claimed = 0
+            if claimed < settings.OUTBOX_BATCH_SIZE:
+                # lote incompleto: no hay más pendientes por ahora
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), settings.OUTBOX_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _claim(self, db: AsyncSession) -> list[Any]:
+        pending = (
+            select(OutboxEvento.id_evento)
+            .where(
+                OutboxEvento.fecha_publicacion.is_(None),
+                OutboxEvento.proximo_intento <= func.now(),
+            )
+            .order_by(OutboxEvento.proximo_intento, OutboxEvento.id_evento)
+            .limit(settings.OUTBOX_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        result = await db.execute(
+            update(OutboxEvento)
+            .where(OutboxEvento.id_evento.in_(pending.scalar_subquery()))
+            .values(
+                proximo_intento=func.now()
+                + func.make_interval(0, 0, 0, 0, 0, 0, settings.OUTBOX_LEASE_SECONDS)
+            )
+            .returning(
+                OutboxEvento.id_evento,
+                OutboxEvento.productos_id_prod,
+                OutboxEvento.tipo,
+                OutboxEvento.fecha_creacion,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        rows = result.all()
+        await db.commit()
+        return rows
+
+    async def dispatch_once(self) -> int:
+        async with self.session_factory() as db:
+            rows = await self._claim(db)
+        if not rows:
+            return 0
+
+        ids = [row.id_evento for row in rows]
+        events = coalesce(rows)
+        try:
+            for sink in self.sinks:
+                await sink.publish(events)
+        except Exception as e:
+            await self._retry_later(ids, e)
+            OUTBOX_EVENTS.labels("failed").inc(len(ids))
+            logger.warning(f"Outbox: no se pudieron publicar {len(ids)} eventos: {e}")
+            return len(rows)
+
+        async with self.session_factory() as db:
+            await db.execute(
+                update(OutboxEvento)
+                .where(OutboxEvento.id_evento.in_(ids))
+                .values(fecha_publicacion=func.now(), ultimo_error=None)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        OUTBOX_EVENTS.labels("published").inc(len(ids))
+        return len(rows)
+
+    async def _retry_later(self, ids: list[int], error: Exception) -> None:
+        # base * 2^intentos con jitter (50-100 %), acotado a OUTBOX_RETRY_MAX_SECONDS.
+        # El exponente también se acota: con muchos intentos power() desborda
+        delay = func.least(
+            settings.OUTBOX_RETRY_MAX_SECONDS,
+            settings.OUTBOX_RETRY_BASE_SECONDS
+            * func.power(2, func.least(OutboxEvento.intentos, _MAX_BACKOFF_EXPONENT)),
+        ) * (0.5 + func.random() / 2)
+        async with self.session_factory() as db:
+            await db.execute(
+                update(OutboxEvento)
+                .where(OutboxEvento.id_evento.in_(ids))
+                .values(
+                    intentos=OutboxEvento.intentos + 1,
+                    proximo_intento=func.now() + func.make_interval(0, 0, 0, 0, 0, 0, delay),
+                    ultimo_error=str(error)[:500],
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+    async def prune(self) -> None:
+        self._last_prune = time.monotonic()
+        async with self.session_factory() as db:
+            await db.execute(
+                delete(OutboxEvento).where(
+                    OutboxEvento.fecha_publicacion
+                    < func.now() - func.make_interval(0, 0, 0, 0, settings.OUTBOX_RETENTION_HOURS)
+                )
+            )
+            await db.commit()
+
+
+def build_dispatcher() -> OutboxDispatcher | None:
+    if not settings.OUTBOX_ENABLED:
+        return None
+    sinks: list[OutboxSink] = []
+    if settings.OUTBOX_WEBHOOK_URL:
+        sinks.append(
+            WebhookSink(settings.OUTBOX_WEBHOOK_URL, settings.OUTBOX_WEBHOOK_TIMEOUT_SECONDS)
+        )
+    if settings.OUTBOX_FILE_PATH:
+        sinks.append(FileSink(settings.OUTBOX_FILE_PATH))
+    if not sinks:
+        logger.warning("Outbox activo sin sinks: los eventos se acumulan sin publicarse")
+        return None
+    return OutboxDispatcher(sinks)
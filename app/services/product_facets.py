@@ -0,0 +1,122 @@
+from collections import defaultdict
+
+from sqlalchemy import Text, cast, func, literal, null, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.product_models import Producto, ProductoAtributo, categorias_productos
+from app.schemas.product_schemas import (
+    FacetaAtributo,
+    FacetaCategoria,
+    FacetaProveedor,
+    FacetaValor,
+    ProductoFacetas,
+)
+from app.services.product_filters import ProductFilters
+from app.services.reference_data import categorias_cache, proveedores_cache
+
+
+def facets_query(filters: ProductFilters):
+    # productos que cumplen los filtros, una sola vez; cada faceta es un
+    # GROUP BY sobre ellos y todo sale en una ida con UNION ALL
+    matched = filters.apply(select(Producto.id_producto)).cte("matched")
+    pid = matched.c.id_producto
+
+    total = select(
+        literal("total").label("faceta"),
+        cast(null(), Text).label("clave"),
+        cast(null(), Text).label("valor"),
+        func.count().label("cantidad"),
+    ).select_from(matched)
+
+    categorias = (
+        select(
+            literal("categoria"),
+            cast(categorias_productos.c.categorias_categoria, Text),
+            cast(null(), Text),
+            func.count(),
+        )
+        .join_from(matched, categorias_productos, categorias_productos.c.productos_producto == pid)
+        .group_by(categorias_productos.c.categorias_categoria)
+    )
+
+    proveedores = (
+        select(
+            literal("proveedor"),
+            cast(Producto.proveedores_id_proveedor, Text),
+            cast(null(), Text),
+            func.count(),
+        )
+        .join_from(matched, Producto, Producto.id_producto == pid)
+        .where(Producto.proveedores_id_proveedor.is_not(None))
+        .group_by(Producto.proveedores_id_proveedor)
+    )
+
+    # distinct: un producto con el mismo par repetido cuenta una vez
+    atributos = (
+        select(
+            literal("atributo"),
+            ProductoAtributo.nombre_atributo,
+            ProductoAtributo.valor,
+            func.count(ProductoAtributo.productos_id_prod.distinct()),
+        )
+        .join_from(matched, ProductoAtributo, ProductoAtributo.productos_id_prod == pid)
+        .where(ProductoAtributo.valor.is_not(None))
+        .group_by(ProductoAtributo.nombre_atributo, ProductoAtributo.valor)
+    )
+
+    return union_all(total, categorias, proveedores, atributos)
+
+
+async def compute_facets(db: AsyncSession, filters: ProductFilters) -> ProductoFacetas:
+    total = 0
+    categorias: dict[int, int] = {}
+    proveedores: dict[int, int] = {}
+    atributos: dict[str, list[tuple[str, int]]] = defaultdict(list)
+    for faceta, clave, valor, cantidad in await db.execute(facets_query(filters)):
+        if faceta == "total":
+            total = cantidad
+        elif faceta == "categoria":
+            categorias[int(clave)] = cantidad
+        elif faceta == "proveedor":
+            proveedores[int(clave)] = cantidad
+        else:
+            atributos[clave].append((valor, cantidad))
+
+    # nombres desde las cachés de referencia
+    nombres_cat = await categorias_cache.get_many(db, categorias)
+    nombres_prov = await proveedores_cache.get_many(db, proveedores, filters.empresa_id)
+
+    def by_count(item):
+        return -item[1], item[0]
+
+    # datos ya agregados por la BD: sin validar de nuevo
+    return ProductoFacetas.model_construct(
+        total=total,
+        categorias=[
+            FacetaCategoria.model_construct(
+                id_categoria=c,
+                nombre=nombres_cat[c].nombre if c in nombres_cat else None,
+                cantidad=n,
+            )
+            for c, n in sorted(categorias.items(), key=by_count)
+        ],
+        proveedores=[
+            FacetaProveedor.model_construct(
+                id_proveedor=p,
+                nombre=nombres_prov[p].nombre if p in nombres_prov else None,
+                cantidad=n,
+            )
+            for p, n in sorted(proveedores.items(), key=by_count)
+        ],
+        atributos=[
+            FacetaAtributo.model_construct(
+                nombre_atributo=nombre,
+                valores=[
+                    FacetaValor.model_construct(valor=v, cantidad=n)
+                    for v, n in sorted(valores, key=by_count)[: settings.FACETS_MAX_VALUES]
+                ],
+            )
+            for nombre, valores in sorted(atributos.items())
+        ],
+    )
@@ -0,0 +1,145 @@
+from fastapi import Depends, HTTPException, Query, Request
+from sqlalchemy import Select, intersect, select
+
+from app.api.deps import get_tenant_id
+from app.api.pagination import SortKey
+from app.core.config import settings
+from app.db.search import fulltext_clause, ilike_clause
+from app.models.product_models import Producto, ProductoAtributo, categorias_productos
+from app.services.product_reader import PRODUCT_FIELDS, SUMMARY_FIELDS
+from app.services.tenancy import product_scope
+
+ATTRIBUTE_FILTER_PREFIX = "attr."
+
+
+def parse_attribute_filters(request: Request) -> dict[str, tuple[str, ...]]:
+    # attr.Color=Negro&attr.RAM=16GB -> AND; attr.Color repetido -> OR
+    filters: dict[str, list[str]] = {}
+    for key, value in request.query_params.multi_items():
+        if not key.startswith(ATTRIBUTE_FILTER_PREFIX) or value == "":
+            continue
+        name = key[len(ATTRIBUTE_FILTER_PREFIX):]
+        if not name:
+            raise HTTPException(status_code=400, detail="Filtro de atributo sin nombre")
+        values = filters.setdefault(name, [])
+        if value not in values:
+            values.append(value)
+    if len(filters) > settings.PRODUCT_ATTRIBUTE_FILTERS_MAX:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Máximo {settings.PRODUCT_ATTRIBUTE_FILTERS_MAX} filtros de atributo",
+        )
+    # orden estable: misma consulta para los mismos filtros
+    return {name: tuple(sorted(values)) for name, values in sorted(filters.items())}
+
+
+def attribute_condition(filters: dict[str, tuple[str, ...]]):
+    # un SELECT por atributo sobre (nombre_atributo, valor, productos_id_prod):
+    # cada uno se resuelve con el índice, y INTERSECT deja los que cumplen todos
+    branches = [
+        select(ProductoAtributo.productos_id_prod).where(
+            ProductoAtributo.nombre_atributo == name,
+            ProductoAtributo.valor.in_(values),
+        )
+        for name, values in filters.items()
+    ]
+    ids = branches[0] if len(branches) == 1 else intersect(*branches)
+    return Producto.id_producto.in_(ids)
+
+
+class ProductFilters:
+    """Filtros comunes de GET /products (listado, export, etc.).
+
+    Se usa como dependencia: ``filters: ProductFilters = Depends()``. Los
+    filtros por atributo llegan como ``attr.<nombre>=<valor>``; la empresa
+    del usuario se aplica siempre.
+    """
+
+    def __init__(
+        self,
+        request: Request,
+        search: str | None = None,
+        search_mode: str | None = Query(None, pattern="^(ilike|fulltext)$"),
+        categoria_id: int | None = None,
+        proveedor_id: int | None = None,
+        only_active: bool = True,
+        empresa_id: int | None = Depends(get_tenant_id),
+    ):
+        self.empresa_id = empresa_id
+        self.search = search
+        self.categoria_id = categoria_id
+        self.proveedor_id = proveedor_id
+        self.only_active = only_active
+        self.attributes = parse_attribute_filters(request)
+
+        # por defecto ordenamos por id; en fulltext por relevancia y luego id
+        self.rank = None
+        self.search_condition = None
+        if search:
+            mode = search_mode or settings.PRODUCT_SEARCH_MODE
+            if mode == "fulltext":
+                self.search_condition, self.rank = fulltext_clause(search)
+            else:
+                self.search_condition = ilike_clause(search)
+
+    @property
+    def order(self) -> list[SortKey]:
+        if self.rank is not None:
+            return [(self.rank, True), (Producto.id_producto, False)]
+        return [(Producto.id_producto, False)]
+
+    @property
+    def sort(self) -> str:
+        return "rank" if self.rank is not None else "id"
+
+    def apply(self, query: Select) -> Select:
+        # empresa primero: coincide con ix_productos_empresa_estado_id
+        query = query.where(*product_scope(self.empresa_id))
+        if self.only_active:
+            query = query.where(Producto.estado == True)  # noqa
+
+        if self.search_condition is not None:
+            query = query.where(self.search_condition)
+
+        if self.proveedor_id:
+            query = query.where(Producto.proveedores_id_proveedor == self.proveedor_id)
+
+        if self.categoria_id:
+            # basta con la tabla pivot, sin unir categorias
+            query = query.join(
+                categorias_productos,
+                categorias_productos.c.productos_producto == Producto.id_producto,
+            ).where(categorias_productos.c.categorias_categoria == self.categoria_id)
+
+        if self.attributes:
+            query = query.where(attribute_condition(self.attributes))
+
+        return query
+
+
+class ProductFieldset:
+    """Proyección de la respuesta: ``fields=codigo_sku,nombre,precio`` o ``view=summary``.
+
+    ``fields`` es ``None`` cuando se pide el ``ProductoRead`` completo.
+    """
+
+    def __init__(
+        self,
+        fields: str | None = None,
+        view: str = Query("full", pattern="^(full|summary)$"),
+    ):
+        self.fields: tuple[str, ...] | None = None
+        if fields:
+            requested = {f.strip() for f in fields.split(",") if f.strip()}
+            if not requested:
+                raise HTTPException(status_code=400, detail="fields no puede estar vacío")
+            unknown = sorted(requested.difference(PRODUCT_FIELDS))
+            if unknown:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Campos desconocidos: {', '.join(unknown)}",
+                )
+            # orden canónico: misma proyección => misma clave de caché / ETag
+            self.fields = tuple(f for f in PRODUCT_FIELDS if f in requested)
+        elif view == "summary":
+            self.fields = SUMMARY_FIELDS
@@ -0,0 +1,448 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Collection, Sequence
+
+from fastapi import HTTPException, status
+from loguru import logger
+from pydantic import BaseModel, create_model
+from sqlalchemy import delete, func, insert, literal_column, select, update
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.etag import make_etag
+from app.models.product_models import Producto, ProductoAtributo, categorias_productos
+from app.schemas.product_schemas import (
+    CategoriaRead,
+    ProductoAtributoRead,
+    ProductoRead,
+    ProductoSummary,
+    ProveedorRead,
+    UnidadMedidaRead,
+)
+from app.services.reference_data import (
+    categorias_cache,
+    proveedores_cache,
+    unidades_cache,
+)
+
+# columnas propias de Producto que forman parte de ProductoRead
+PRODUCT_COLUMNS = [
+    c.key for c in Producto.__table__.columns if c.key in ProductoRead.model_fields
+]
+
+# relaciones de ProductoRead y la FK que necesitan (si aplica)
+RELATION_FIELDS = {
+    "proveedor": "proveedores_id_proveedor",
+    "unidad_medida": "unidades_medida_id_unidad",
+    "categorias": None,
+    "atributos": None,
+}
+PRODUCT_FIELDS = list(ProductoRead.model_fields)
+SUMMARY_FIELDS = tuple(ProductoSummary.model_fields)
+
+
+def fieldset_columns(fields: Collection[str] | None = None) -> list:
+    # columnas mínimas para un fieldset (id siempre: cursor, ETag, relaciones)
+    if fields is None:
+        names = set(PRODUCT_COLUMNS)
+    else:
+        names = {"id_producto", *(f for f in fields if f in PRODUCT_COLUMNS)}
+        names.update(RELATION_FIELDS[f] for f in fields if RELATION_FIELDS.get(f))
+    return [Producto.__table__.c[c] for c in PRODUCT_COLUMNS if c in names]
+
+
+@lru_cache(maxsize=256)
+def fieldset_model(fields: tuple[str, ...]) -> type[BaseModel]:
+    # modelo de respuesta con solo los campos pedidos
+    if fields == SUMMARY_FIELDS:
+        return ProductoSummary
+    return create_model(
+        "ProductoParcial",
+        **{
+            f: (ProductoRead.model_fields[f].annotation, ...)
+            for f in PRODUCT_FIELDS
+            if f in fields
+        },
+    )
+
+
+# ids de categorías de cada producto en la misma query (índice por producto);
+# alias: el listado puede unir la pivot para filtrar por categoría
+_links = categorias_productos.alias("links")
+CATEGORY_IDS = (
+    select(
+        func.coalesce(
+            func.array_agg(aggregate_order_by(_links.c.categorias_categoria, _links.c.categorias_categoria)),
+            literal_column("'{}'::int[]"),
+        )
+    )
+    .where(_links.c.productos_producto == Producto.__table__.c.id_producto)
+    .correlate(Producto.__table__)
+    .scalar_subquery()
+)
+
+
+@dataclass
+class ProductReferences:
+    """Proveedores, unidades y categorías de una respuesta, con su versión.
+
+    El ETag y el cuerpo se arman con estas mismas entradas de caché.
+    """
+
+    proveedores: dict[int, tuple[ProveedorRead, str]]
+    unidades: dict[int, tuple[UnidadMedidaRead, str]]
+    categorias: dict[int, tuple[CategoriaRead, str]]
+
+
+async def load_references(
+    db: AsyncSession,
+    rows: Sequence,
+    fields: Collection[str] | None = None,
+    empresa_id: int | None = None,
+) -> ProductReferences:
+    # rows con category_ids (CATEGORY_IDS); solo las relaciones de la respuesta.
+    # Un proveedor de otra empresa no se devuelve (_required corta con 409)
+    def wanted(field: str) -> bool:
+        return fields is None or field in fields
+
+    return ProductReferences(
+        proveedores=(
+            await proveedores_cache.get_versioned(
+                db, (r.proveedores_id_proveedor for r in rows), empresa_id
+            )
+            if wanted("proveedor")
+            else {}
+        ),
+        unidades=(
+            await unidades_cache.get_versioned(db, (r.unidades_medida_id_unidad for r in rows))
+            if wanted("unidad_medida")
+            else {}
+        ),
+        categorias=(
+            await categorias_cache.get_versioned(db, (c for r in rows for c in r.category_ids))
+            if wanted("categorias")
+            else {}
+        ),
+    )
+
+
+def products_etag(
+    rows: Sequence, refs: ProductReferences, fields: Sequence[str] | None = None
+) -> str:
+    # versión de cada fila + versión de cada referencia que entra en el cuerpo
+    # (la proyección también forma parte de la representación)
+    parts = [] if fields is None else [",".join(fields)]
+    for r in rows:
+        parts.append(r.version)
+        if refs.proveedores:
+            parts.append(refs.proveedores.get(r.proveedores_id_proveedor, (None, "-"))[1])
+        if refs.unidades:
+            parts.append(refs.unidades.get(r.unidades_medida_id_unidad, (None, "-"))[1])
+        if fields is None or "categorias" in fields:
+            parts.extend(refs.categorias.get(c, (None, "-"))[1] for c in r.category_ids)
+    return make_etag(parts)
+
+
+def _items(versioned: dict[int, tuple]) -> dict:
+    return {id_: item for id_, (item, _) in versioned.items()}
+
+
+async def load_category_ids(
+    db: AsyncSession, product_ids: Sequence[int]
+) -> dict[int, list[int]]:
+    links: dict[int, list[int]] = defaultdict(list)
+    if not product_ids:
+        return links
+    result = await db.execute(
+        select(
+            categorias_productos.c.productos_producto,
+            categorias_productos.c.categorias_categoria,
+        )
+        .where(categorias_productos.c.productos_producto.in_(product_ids))
+        .order_by(categorias_productos.c.categorias_categoria)
+    )
+    for product_id, category_id in result:
+        links[product_id].append(category_id)
+    return links
+
+
+async def load_attributes(
+    db: AsyncSession, product_ids: Sequence[int]
+) -> dict[int, list[ProductoAtributoRead]]:
+    attrs: dict[int, list[ProductoAtributoRead]] = defaultdict(list)
+    if not product_ids:
+        return attrs
+    result = await db.execute(
+        select(
+            ProductoAtributo.productos_id_prod,
+            ProductoAtributo.id_atributo,
+            ProductoAtributo.nombre_atributo,
+            ProductoAtributo.valor,
+        )
+        .where(ProductoAtributo.productos_id_prod.in_(product_ids))
+        .order_by(ProductoAtributo.id_atributo)
+    )
+    for product_id, id_atributo, nombre, valor in result:
+        # datos de la BD: sin validar de nuevo
+        attrs[product_id].append(
+            ProductoAtributoRead.model_construct(
+                id_atributo=id_atributo, nombre_atributo=nombre, valor=valor
+            )
+        )
+    return attrs
+
+
+async def build_product_reads(
+    db: AsyncSession, products: Sequence[Producto], empresa_id: int | None = None
+) -> list[ProductoRead]:
+    # pivot + atributos en 2 queries; proveedor/unidad/categorías desde caché
+    ids = [p.id_producto for p in products]
+    links = await load_category_ids(db, ids)
+    attrs = await load_attributes(db, ids)
+
+    proveedores = await proveedores_cache.get_many(
+        db, (p.proveedores_id_proveedor for p in products), empresa_id
+    )
+    unidades = await unidades_cache.get_many(
+        db, (p.unidades_medida_id_unidad for p in products)
+    )
+    categorias = await categorias_cache.get_many(
+        db, (c for cats in links.values() for c in cats)
+    )
+
+    return assemble_product_reads(products, links, attrs, proveedores, unidades, categorias)
+
+
+def _complete(p, proveedores: dict | None, unidades: dict | None) -> bool:
+    # proveedor y unidad son obligatorios en ProductoRead y model_construct no
+    # valida: una fila huérfana (FK nula, fila borrada, proveedor de otra
+    # empresa) se registra y se omite, sin cortar el resto de la colección.
+    # None = relación no pedida en la respuesta
+    missing = []
+    if proveedores is not None and p.proveedores_id_proveedor not in proveedores:
+        missing.append("proveedor")
+    if unidades is not None and p.unidades_medida_id_unidad not in unidades:
+        missing.append("unidad de medida")
+    if missing:
+        logger.warning(f"Producto {p.id_producto} omitido: sin {' ni '.join(missing)} válido")
+    return not missing
+
+
+def orphan_error(product_id: int) -> HTTPException:
+    # un solo producto pedido y omitido: no hay colección que salvar
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Producto {product_id} sin proveedor o unidad de medida válidos",
+    )
+
+
+def assemble_product_reads(
+    products: Sequence[Producto],
+    links: dict[int, list[int]],
+    attrs: dict[int, list[ProductoAtributoRead]],
+    proveedores: dict[int, ProveedorRead],
+    unidades: dict[int, UnidadMedidaRead],
+    categorias: dict[int, CategoriaRead],
+) -> list[ProductoRead]:
+    # todo viene de la BD o de schemas ya validados: model_construct evita
+    # validar otra vez cada campo (la serialización sigue siendo la de pydantic)
+    construct = ProductoRead.model_construct
+    return [
+        construct(
+            **{col: getattr(p, col) for col in PRODUCT_COLUMNS},
+            proveedor=proveedores[p.proveedores_id_proveedor],
+            unidad_medida=unidades[p.unidades_medida_id_unidad],
+            categorias=[
+                categorias[c] for c in links.get(p.id_producto, []) if c in categorias
+            ],
+            atributos=attrs.get(p.id_producto, []),
+        )
+        for p in products
+        if _complete(p, proveedores, unidades)
+    ]
+
+
+async def render_product_reads(
+    db: AsyncSession, rows: Sequence, refs: ProductReferences
+) -> list[ProductoRead]:
+    # rows con category_ids: solo falta leer los atributos
+    attrs = await load_attributes(db, [r.id_producto for r in rows])
+    links = {r.id_producto: list(r.category_ids) for r in rows}
+    return assemble_product_reads(
+        rows, links, attrs, _items(refs.proveedores), _items(refs.unidades), _items(refs.categorias)
+    )
+
+
+async def build_product_views(
+    db: AsyncSession, products: Sequence, fields: tuple[str, ...], refs: ProductReferences
+) -> list[BaseModel]:
+    # como render_product_reads, pero solo con las relaciones pedidas
+    model = fieldset_model(fields)
+    ids = [p.id_producto for p in products]
+    links = {p.id_producto: list(p.category_ids) for p in products} if "categorias" in fields else {}
+    attrs = await load_attributes(db, ids) if "atributos" in fields else {}
+    proveedores = _items(refs.proveedores)
+    unidades = _items(refs.unidades)
+    categorias = _items(refs.categorias)
+
+    views = []
+    for p in products:
+        if not _complete(
+            p,
+            proveedores if "proveedor" in fields else None,
+            unidades if "unidad_medida" in fields else None,
+        ):
+            continue
+        data = {f: getattr(p, f) for f in fields if f in PRODUCT_COLUMNS}
+        if "proveedor" in fields:
+            data["proveedor"] = proveedores[p.proveedores_id_proveedor]
+        if "unidad_medida" in fields:
+            data["unidad_medida"] = unidades[p.unidades_medida_id_unidad]
+        if "categorias" in fields:
+            data["categorias"] = [
+                categorias[c] for c in links.get(p.id_producto, []) if c in categorias
+            ]
+        if "atributos" in fields:
+            data["atributos"] = attrs.get(p.id_producto, [])
+        views.append(model.model_construct(**data))
+    return views
+
+
+async def build_product_read(
+    db: AsyncSession,
+    product,
+    category_ids: list[int] | None = None,
+    atributos: list[ProductoAtributoRead] | None = None,
+    empresa_id: int | None = None,
+) -> ProductoRead:
+    # respuesta de una escritura: lo que ya está en memoria no se vuelve a leer
+    pid = product.id_producto
+    if category_ids is None:
+        category_ids = (await load_category_ids(db, [pid])).get(pid, [])
+    if atributos is None:
+        atributos = (await load_attributes(db, [pid])).get(pid, [])
+
+    proveedores = await proveedores_cache.get_many(
+        db, [product.proveedores_id_proveedor], empresa_id
+    )
+    unidades = await unidades_cache.get_many(db, [product.unidades_medida_id_unidad])
+    categorias = await categorias_cache.get_many(db, category_ids)
+    reads = assemble_product_reads(
+        [product], {pid: category_ids}, {pid: atributos}, proveedores, unidades, categorias
+    )
+    if not reads:
+        raise orphan_error(pid)
+    return reads[0]
+
+
+async def insert_attributes(
+    db: AsyncSession, product_id: int, atributos: Sequence
+) -> list[ProductoAtributoRead]:
+    # un solo INSERT multi-fila; los ids vuelven en el orden enviado
+    # (render_nulls: sin él, las filas con valor None van en otro INSERT)
+    if not atributos:
+        return []
+    result = await db.execute(
+        insert(ProductoAtributo)
+        .returning(ProductoAtributo.id_atributo, sort_by_parameter_order=True)
+        .execution_options(render_nulls=True),
+        [
+            {
+                "nombre_atributo": a.nombre_atributo,
+                "valor": a.valor,
+                "productos_id_prod": product_id,
+            }
+            for a in atributos
+        ],
+    )
+    return [
+        ProductoAtributoRead.model_construct(
+            id_atributo=id_atributo, nombre_atributo=a.nombre_atributo, valor=a.valor
+        )
+        for id_atributo, a in zip(result.scalars(), atributos)
+    ]
+
+
+async def replace_attributes(
+    db: AsyncSession, product_id: int, atributos: Sequence
+) -> list[ProductoAtributoRead]:
+    # reemplazo por diferencia, clave nombre_atributo: las filas que siguen
+    # conservan su id; a lo sumo un INSERT, un UPDATE y un DELETE
+    desired = {a.nombre_atributo: a.valor for a in atributos}  # el último gana
+    result = await db.execute(
+        select(
+            ProductoAtributo.id_atributo,
+            ProductoAtributo.nombre_atributo,
+            ProductoAtributo.valor,
+        )
+        .where(ProductoAtributo.productos_id_prod == product_id)
+        .order_by(ProductoAtributo.id_atributo)
+    )
+
+    kept: dict[str, int] = {}
+    to_update, to_delete = [], []
+    for id_atributo, nombre, valor in result:
+        if nombre not in desired or nombre in kept:
+            # fuera del nuevo conjunto, o nombre repetido
+            to_delete.append(id_atributo)
+            continue
+        kept[nombre] = id_atributo
+        if valor != desired[nombre]:
+            to_update.append({"id_atributo": id_atributo, "valor": desired[nombre]})
+
+    if to_delete:
+        await db.execute(
+            delete(ProductoAtributo).where(ProductoAtributo.id_atributo.in_(to_delete))
+        )
+    if to_update:
+        # UPDATE por clave primaria en lote (executemany)
+        await db.execute(
+            update(ProductoAtributo).execution_options(synchronize_session=False),
+            to_update,
+        )
+    inserted = await insert_attributes(
+        db,
+        product_id,
+        [
+            ProductoAtributoRead.model_construct(nombre_atributo=nombre, valor=valor)
+            for nombre, valor in desired.items()
+            if nombre not in kept
+        ],
+    )
+
+    # mismo orden que load_attributes
+    reads = [
+        ProductoAtributoRead.model_construct(
+            id_atributo=id_atributo, nombre_atributo=nombre, valor=desired[nombre]
+        )
+        for nombre, id_atributo in kept.items()
+    ]
+    return sorted(reads + inserted, key=lambda a: a.id_atributo)
+
+
+async def set_product_categories(
+    db: AsyncSession,
+    product_id: int,
+    categorias_ids: Sequence[int],
+    replace: bool = False,
+) -> list[int]:
+    # solo se enlazan categorías existentes (mismo criterio que el IN previo)
+    existing = await categorias_cache.get_many(db, categorias_ids)
+
+    if replace:
+        await db.execute(
+            delete(categorias_productos).where(
+                categorias_productos.c.productos_producto == product_id
+            )
+        )
+    if existing:
+        await db.execute(
+            insert(categorias_productos),
+            [
+                {"categorias_categoria": c, "productos_producto": product_id}
+                for c in existing
+            ],
+        )
+    # mismo orden que load_category_ids
+    return sorted(existing)
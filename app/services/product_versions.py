@@ -0,0 +1,65 @@
+from sqlalchemy import BigInteger, DateTime, Text, cast, func, literal_column, select, text
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.product_models import Producto, ProductoAtributo
+
+# columnas de migrations/003_product_change_feed.sql; no se mapean en el
+# modelo para que el resto de la API funcione aunque no esté aplicada
+version = literal_column("productos.version", BigInteger)
+updated_at = literal_column("productos.updated_at", DateTime(timezone=True))
+
+# None = todavía no se consultó si la migración está aplicada
+_has_version_column: bool | None = None
+
+
+async def version_source(db: AsyncSession) -> str:
+    # "version" si existe productos.version (auto: se consulta una vez por proceso)
+    global _has_version_column
+    if settings.PRODUCT_ETAG_SOURCE != "auto":
+        return settings.PRODUCT_ETAG_SOURCE
+    if _has_version_column is None:
+        _has_version_column = bool(
+            await db.scalar(
+                text(
+                    "select exists (select 1 from information_schema.columns "
+                    "where table_schema = current_schema() "
+                    "and table_name = 'productos' and column_name = 'version')"
+                )
+            )
+        )
+    return "version" if _has_version_column else "hash"
+
+
+def content_hash():
+    # sin la migración: md5 de la fila y sus atributos; categorías, proveedor
+    # y unidad entran al ETag aparte (ids + versión de su entrada en caché)
+    producto = Producto.__table__
+    atributos = (
+        select(
+            func.json_agg(
+                aggregate_order_by(
+                    func.json_build_array(
+                        ProductoAtributo.id_atributo,
+                        ProductoAtributo.nombre_atributo,
+                        ProductoAtributo.valor,
+                    ),
+                    ProductoAtributo.id_atributo,
+                )
+            )
+        )
+        .where(ProductoAtributo.productos_id_prod == producto.c.id_producto)
+        .scalar_subquery()
+    )
+    return func.md5(
+        cast(func.json_build_array(*producto.columns, atributos), Text)
+    )
+
+
+def version_column(source: str):
+    # versión de la fila para el ETag: xid de la última escritura (producto,
+    # atributos o categorías) o, como respaldo, el hash del contenido
+    if source == "version":
+        return cast(version, Text)
+    return content_hash()
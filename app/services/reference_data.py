@@ -0,0 +1,112 @@
+import hashlib
+from typing import Any, Generic, Iterable, Type, TypeVar
+
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, read_engine
+from app.models.product_models import Categoria, Proveedor, UnidadMedida
+from app.schemas.product_schemas import CategoriaRead, ProveedorRead, UnidadMedidaRead
+
+S = TypeVar("S", bound=BaseModel)
+
+
+class ReferenceCache(Generic[S]):
+    """Read-through de tablas de referencia (categorías, unidades, proveedores).
+
+    Guarda los schemas *Read* (no objetos ORM) para poder compartirlos entre
+    sesiones. La invalidación es local al proceso; entre workers manda el TTL.
+    Los faltantes se leen siempre del primario: una fila vieja de la réplica
+    quedaría servida a todos durante el TTL.
+    """
+
+    def __init__(self, model: Type[Any], pk: Any, schema: Type[S], tenant: Any = None):
+        self.model = model
+        self.pk = pk
+        self.schema = schema
+        # columna de empresa (proveedores): el schema Read no la expone
+        self.tenant = tenant
+        self._cache = TTLCache(
+            maxsize=settings.REFERENCE_CACHE_SIZE,
+            ttl=settings.REFERENCE_CACHE_TTL_SECONDS,
+        )
+
+    async def get_versioned(
+        self, db: AsyncSession, ids: Iterable[int], empresa_id: int | None = None
+    ) -> dict[int, tuple[S, str]]:
+        # (schema, versión): la versión es el hash de lo que se serializa, así
+        # un ETag armado con ella describe exactamente la entrada que se sirve.
+        # Con empresa_id, las filas de otra empresa quedan afuera
+        entries: dict[int, tuple[S, str, int | None]] = {}
+        missing: list[int] = []
+        for id_ in dict.fromkeys(i for i in ids if i is not None):
+            entry = self._cache.get(id_)
+            if entry is None:
+                missing.append(id_)
+            else:
+                entries[id_] = entry
+
+        if missing:
+            if read_engine is not None and db.bind is read_engine:
+                # tablas chicas y pocos faltantes: una ida extra al primario
+                async with AsyncSessionLocal() as primary:
+                    loaded = await self._load(primary, missing)
+            else:
+                loaded = await self._load(db, missing)
+            for id_, (item, tenant) in loaded.items():
+                entry = (item, hashlib.md5(item.model_dump_json().encode()).hexdigest(), tenant)
+                self._cache.set(id_, entry)
+                entries[id_] = entry
+
+        scoped = empresa_id is not None and self.tenant is not None
+        return {
+            id_: (item, version)
+            for id_, (item, version, tenant) in entries.items()
+            if not scoped or tenant == empresa_id
+        }
+
+    async def get_many(
+        self, db: AsyncSession, ids: Iterable[int], empresa_id: int | None = None
+    ) -> dict[int, S]:
+        versioned = await self.get_versioned(db, ids, empresa_id)
+        return {id_: item for id_, (item, _) in versioned.items()}
+
+    async def _load(self, db: AsyncSession, ids: list[int]) -> dict[int, tuple[S, int | None]]:
+        result = await db.execute(select(self.model).where(self.pk.in_(ids)))
+        return {
+            getattr(row, self.pk.key): (
+                self.schema.model_validate(row),
+                getattr(row, self.tenant.key) if self.tenant is not None else None,
+            )
+            for row in result.scalars()
+        }
+
+    async def get(self, db: AsyncSession, id_: int, empresa_id: int | None = None) -> S | None:
+        return (await self.get_many(db, [id_], empresa_id)).get(id_)
+
+    def invalidate(self, id_: int | None = None) -> None:
+        if id_ is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(id_)
+
+    def stats(self) -> dict[str, int]:
+        return self._cache.stats()
+
+
+categorias_cache = ReferenceCache(Categoria, Categoria.id_categoria, CategoriaRead)
+unidades_cache = ReferenceCache(UnidadMedida, UnidadMedida.id_unidad, UnidadMedidaRead)
+proveedores_cache = ReferenceCache(
+    Proveedor, Proveedor.id_proveedor, ProveedorRead, tenant=Proveedor.empresas_id_emp
+)
+
+
+def reference_cache_stats() -> dict[str, dict[str, int]]:
+    return {
+        "categorias": categorias_cache.stats(),
+        "unidades_medida": unidades_cache.stats(),
+        "proveedores": proveedores_cache.stats(),
+    }
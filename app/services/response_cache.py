@@ -0,0 +1,344 @@
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Awaitable, Callable, Hashable, Iterable, Protocol
+
+from fastapi import Request, Response
+from loguru import logger
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.api.etag import etag_matches, not_modified
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.session import read_engine, wants_primary
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: str
+    product_ids: tuple[int, ...]
+    is_list: bool
+    headers: dict[str, str] = field(default_factory=dict)
+    # momento (epoch) en que empezó el cálculo, antes de leer la BD
+    computed_at: float = 0.0
+    # desde cuándo los datos leídos están garantizados al día: computed_at en
+    # el primario, READ_YOUR_WRITES_SECONDS antes en la réplica (puede atrasar)
+    data_as_of: float = 0.0
+    fresh_until: float = 0.0
+
+
+Renderer = Callable[[AsyncSession], Awaitable[CachedResponse | None]]
+
+
+class ResponseStore(Protocol):
+    """Entradas + marcas de invalidación; una entrada calculada antes de una
+    marca que la afecta no se devuelve."""
+
+    async def get(self, key: Hashable) -> CachedResponse | None: ...
+
+    async def set(self, key: Hashable, entry: CachedResponse, ttl: float) -> None: ...
+
+    async def invalidate(self, product_ids: Iterable[int], lists: bool) -> None: ...
+
+    async def clear(self) -> None: ...
+
+    def stats(self) -> dict[str, int]: ...
+
+
+class MemoryStore:
+    """Entradas y marcas del proceso: la invalidación no llega a otros workers."""
+
+    def __init__(self, maxsize: int, lifetime: float):
+        self.lifetime = lifetime
+        self._cache = TTLCache(maxsize=maxsize, ttl=lifetime)
+        self._invalidated_at: dict[int, float] = {}
+        self._lists_invalidated_at = 0.0
+        self._cleared_at = 0.0
+
+    def _is_valid(self, entry: CachedResponse) -> bool:
+        if self._cleared_at >= entry.data_as_of:
+            return False
+        if entry.is_list and self._lists_invalidated_at >= entry.data_as_of:
+            return False
+        return all(
+            self._invalidated_at.get(pid, 0.0) < entry.data_as_of
+            for pid in entry.product_ids
+        )
+
+    async def get(self, key: Hashable) -> CachedResponse | None:
+        entry = self._cache.get(key)
+        if entry is not None and not self._is_valid(entry):
+            self._cache.pop(key)
+            return None
+        return entry
+
+    async def set(self, key: Hashable, entry: CachedResponse, ttl: float) -> None:
+        if self._is_valid(entry):
+            self._cache.set(key, entry, ttl=ttl)
+
+    async def invalidate(self, product_ids: Iterable[int], lists: bool) -> None:
+        now = time.time()
+        for pid in product_ids:
+            self._invalidated_at[pid] = now
+        if lists:
+            self._lists_invalidated_at = now
+
+        # marcas más viejas que cualquier entrada viva ya no sirven
+        if len(self._invalidated_at) > self._cache.maxsize:
+            horizon = now - self.lifetime
+            self._invalidated_at = {
+                pid: ts for pid, ts in self._invalidated_at.items() if ts > horizon
+            }
+
+    async def clear(self) -> None:
+        self._cleared_at = time.time()
+        self._cache.clear()
+        self._invalidated_at.clear()
+
+    def stats(self) -> dict[str, int]:
+        return self._cache.stats()
+
+
+class RedisStore:
+    """Entradas y marcas compartidas entre workers/instancias (Redis, Valkey...).
+
+    Las marcas viven lo mismo que la entrada más longeva que pueden afectar,
+    así que Redis las poda solo. Los relojes de los hosts deben estar
+    sincronizados (NTP): las marcas se comparan con ``data_as_of``.
+    """
+
+    def __init__(self, url: str, lifetime: float, prefix: str = "respcache:"):
+        try:
+            from redis.asyncio import Redis
+        except ImportError as e:  # dependencia opcional
+            raise RuntimeError(
+                "RESPONSE_CACHE_BACKEND=redis requiere el paquete 'redis'"
+            ) from e
+
+        self.lifetime = lifetime
+        self.prefix = prefix
+        self._redis = Redis.from_url(url)
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_key(self, key: Hashable) -> str:
+        return self.prefix + "e:" + hashlib.sha256(repr(key).encode()).hexdigest()
+
+    def _mark_keys(self, product_ids: Iterable[int], is_list: bool) -> list[str]:
+        keys = [self.prefix + "cleared"]
+        if is_list:
+            keys.append(self.prefix + "lists")
+        keys.extend(f"{self.prefix}p:{pid}" for pid in product_ids)
+        return keys
+
+    async def _is_valid(self, data_as_of: float, product_ids, is_list: bool) -> bool:
+        marks = await self._redis.mget(self._mark_keys(product_ids, is_list))
+        return all(mark is None or float(mark) < data_as_of for mark in marks)
+
+    async def get(self, key: Hashable) -> CachedResponse | None:
+        entry_key = self._entry_key(key)
+        meta, body = await self._redis.hmget(entry_key, ["meta", "body"])
+        if meta is None or body is None:
+            self.misses += 1
+            return None
+        data = json.loads(meta)
+        if not await self._is_valid(data["data_as_of"], data["product_ids"], data["is_list"]):
+            await self._redis.delete(entry_key)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return CachedResponse(
+            body=body, **{**data, "product_ids": tuple(data["product_ids"])}
+        )
+
+    async def set(self, key: Hashable, entry: CachedResponse, ttl: float) -> None:
+        # la vida se cuenta desde computed_at: la entrada vence antes que
+        # cualquier marca que pueda invalidarla
+        expires_in = entry.computed_at + ttl - time.time()
+        if expires_in <= 0 or not await self._is_valid(
+            entry.data_as_of, entry.product_ids, entry.is_list
+        ):
+            return
+        data = asdict(entry)
+        body = data.pop("body")
+        entry_key = self._entry_key(key)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hset(entry_key, mapping={"meta": json.dumps(data), "body": body})
+            pipe.pexpire(entry_key, max(1, int(expires_in * 1000)))
+            await pipe.execute()
+
+    async def _mark(self, keys: list[str]) -> None:
+        if not keys:
+            return
+        now = time.time()
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.set(key, now, px=max(1, int(self.lifetime * 1000)))
+            await pipe.execute()
+
+    async def invalidate(self, product_ids: Iterable[int], lists: bool) -> None:
+        keys = [f"{self.prefix}p:{pid}" for pid in product_ids]
+        if lists:
+            keys.append(self.prefix + "lists")
+        await self._mark(keys)
+
+    async def clear(self) -> None:
+        # sin SCAN: las entradas anteriores quedan inválidas por la marca
+        await self._mark([self.prefix + "cleared"])
+
+    def stats(self) -> dict[str, int]:
+        # contadores de este worker; el tamaño vive en Redis y no se consulta
+        return {"size": 0, "maxsize": 0, "hits": self.hits, "misses": self.misses, "evictions": 0}
+
+
+class ProductResponseCache:
+    """Caché de respuestas de GET /products y GET /products/{id}.
+
+    Cada entrada recuerda qué productos contiene; una escritura marca esos
+    productos (y, si puede cambiar qué productos entran en un listado, todos
+    los listados) y las entradas calculadas antes de la marca dejan de valer.
+    Con ``RESPONSE_CACHE_BACKEND=memory`` las marcas son del proceso (entre
+    workers manda el TTL); con ``redis`` la invalidación es compartida.
+
+    No se usa dentro de la ventana read-your-writes (el cliente tiene que ver
+    su escritura) y un cálculo hecho en la réplica se da por visto
+    ``READ_YOUR_WRITES_SECONDS`` antes (``data_as_of``): si hubo una escritura
+    en ese lapso la réplica puede no verla y la entrada se descarta.
+    """
+
+    def __init__(self, ttl: float, stale: float, store: ResponseStore):
+        self.ttl = ttl
+        self.stale = stale
+        self.store = store
+        self._refreshing: set[Hashable] = set()
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def active(self, request: Request) -> bool:
+        # dentro de la ventana read-your-writes (solo existe con réplica): ni
+        # se lee ni se guarda
+        return self.enabled and not (read_engine is not None and wants_primary(request))
+
+    @staticmethod
+    def key(kind: str, tenant: str, request: Request, *parts) -> Hashable:
+        # query params normalizados: orden y vacíos no cambian la clave
+        params = tuple(sorted((k, v) for k, v in request.query_params.multi_items() if v != ""))
+        return (kind, tenant, *parts, params)
+
+    async def get(self, key: Hashable) -> tuple[CachedResponse, bool] | None:
+        # (entrada, fresca); las entradas vencidas sirven solo como stale
+        try:
+            entry = await self.store.get(key)
+        except Exception as e:
+            # si el backend compartido cae, se responde sin caché
+            logger.warning(f"Caché de respuestas no disponible: {e}")
+            return None
+        if entry is None:
+            return None
+        return entry, entry.fresh_until > time.time()
+
+    async def set(self, key: Hashable, entry: CachedResponse, db: AsyncSession) -> None:
+        # db: la sesión con la que se calculó la entrada (primario o réplica)
+        if not self.enabled:
+            return
+        on_replica = read_engine is not None and db.bind is read_engine
+        entry.data_as_of = entry.computed_at - (
+            settings.READ_YOUR_WRITES_SECONDS if on_replica else 0
+        )
+        now = time.time()
+        if entry.computed_at < now - self.ttl - self.stale:
+            # cálculo más lento que la vida de la entrada (marcas ya podadas)
+            return
+        entry.fresh_until = now + self.ttl
+        try:
+            # hubo una escritura mientras se calculaba: el store no la guarda
+            await self.store.set(key, entry, self.ttl + self.stale)
+        except Exception as e:
+            logger.warning(f"Caché de respuestas no disponible: {e}")
+
+    async def invalidate(self, product_ids: Iterable[int] = (), lists: bool = False) -> None:
+        if not self.enabled:
+            return
+        try:
+            await self.store.invalidate(list(product_ids), lists)
+        except Exception as e:
+            logger.warning(f"No se pudo invalidar la caché de respuestas: {e}")
+
+    async def clear(self) -> None:
+        # cambios en proveedores/unidades/categorías: afectan a cualquier respuesta
+        if not self.enabled:
+            return
+        try:
+            await self.store.clear()
+        except Exception as e:
+            logger.warning(f"No se pudo invalidar la caché de respuestas: {e}")
+
+    def refresh(self, key: Hashable, render: Renderer, session_factory: sessionmaker) -> None:
+        # stale-while-revalidate: una sola recarga en segundo plano por clave
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def run() -> None:
+            try:
+                async with session_factory() as db:
+                    entry = await render(db)
+                    if entry is not None:
+                        await self.set(key, entry, db)
+            except Exception as e:
+                logger.warning(f"No se pudo refrescar la caché de respuestas: {e}")
+            finally:
+                self._refreshing.discard(key)
+
+        task = asyncio.create_task(run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def cache_control(self) -> str:
+        value = f"private, max-age={settings.RESPONSE_CACHE_CONTROL_MAX_AGE}"
+        if self.stale > 0:
+            value += f", stale-while-revalidate={int(self.stale)}"
+        return value
+
+    def respond(self, request: Request, entry: CachedResponse, status: str) -> Response:
+        headers = {
+            **entry.headers,
+            "Cache-Control": self.cache_control(),
+            "X-Cache": status,
+        }
+        if etag_matches(request, entry.etag):
+            return not_modified(entry.etag, headers)
+        return Response(
+            content=entry.body,
+            media_type="application/json",
+            headers={**headers, "ETag": entry.etag},
+        )
+
+    def stats(self) -> dict[str, int]:
+        return self.store.stats()
+
+
+def _build_store() -> ResponseStore:
+    # vida de las marcas: la de una entrada más el atraso admitido de la réplica
+    lifetime = (
+        settings.RESPONSE_CACHE_TTL_SECONDS
+        + settings.RESPONSE_CACHE_STALE_SECONDS
+        + settings.READ_YOUR_WRITES_SECONDS
+    )
+    if settings.RESPONSE_CACHE_BACKEND == "redis":
+        return RedisStore(settings.RESPONSE_CACHE_REDIS_URL, lifetime)
+    return MemoryStore(settings.RESPONSE_CACHE_SIZE, lifetime)
+
+
+product_response_cache = ProductResponseCache(
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+    stale=settings.RESPONSE_CACHE_STALE_SECONDS,
+    store=_build_store(),
+)
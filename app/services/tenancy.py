@@ -0,0 +1,42 @@
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.product_models import Producto, Proveedor
+from app.services.reference_data import proveedores_cache
+
+
+def product_scope(empresa_id: int | None) -> list:
+    # condiciones para .where(*...); vacías si la request no está acotada
+    if empresa_id is None:
+        return []
+    return [Producto.empresas_id_empresa == empresa_id]
+
+
+def supplier_scope(empresa_id: int | None) -> list:
+    if empresa_id is None:
+        return []
+    return [Proveedor.empresas_id_emp == empresa_id]
+
+
+def tenant_key(empresa_id: int | None) -> str:
+    # clave de caché: las respuestas se comparten solo dentro de una empresa
+    return f"empresa:{empresa_id}" if empresa_id is not None else "empresa:*"
+
+
+def check_tenant(empresa_id: int | None, value: int | None) -> None:
+    # escrituras: no se crean ni mueven filas a otra empresa
+    if empresa_id is not None and value is not None and value != empresa_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="La empresa no coincide con la del usuario",
+        )
+
+
+async def check_supplier(db: AsyncSession, empresa_id: int | None, proveedor_id: int) -> None:
+    # el proveedor tiene que ser de la empresa del producto; si no, su
+    # nombre/contacto terminaría en respuestas de otra empresa
+    if not await proveedores_cache.get(db, proveedor_id, empresa_id):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Proveedor no encontrado",
+        )
@@ -0,0 +1,319 @@
+"""Benchmark de carga del servicio de productos: throughput y p50/p95/p99.
+
+Corre ``app.main.create_app`` en proceso (httpx + ASGITransport, sin red)
+contra la BD de ``DATABASE_URL`` sembrada con ``bench.seed``, con la auth
+reemplazada por un usuario de la empresa 1. Cada escenario (list, get,
+search, create, update) se mide por separado: ``--warmup`` segundos sin
+medir y ``--duration`` segundos con ``--concurrency`` clientes en paralelo.
+
+El resultado queda en JSON (``--out``, por defecto ``bench/results/``) con
+el commit, el tamaño del catálogo y la versión de Postgres; ``--baseline``
+compara contra una corrida anterior. Los productos del escenario create
+(SKU ``bench-load-*``) se borran al terminar para que corridas sucesivas
+midan el mismo catálogo (``--keep-created`` los deja).
+
+    python -m bench.seed --products 100000 --reset
+    python -m bench.load --duration 20 --concurrency 16
+    python -m bench.load --baseline bench/results/<anterior>.json
+
+Para medir con workers reales, levantar la app del benchmark con uvicorn
+y apuntar ``--url`` a ella:
+
+    uvicorn bench.load:create_bench_app --factory --workers 4
+    python -m bench.load --url http://127.0.0.1:8000
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+from sqlalchemy import text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# antes de importar la app: settings se lee una sola vez. Sin rate limit,
+# sin caché de respuestas (se mide la BD, no la caché) y sin logs por request
+os.environ.setdefault("RATE_LIMIT_PER_IP", "100000000/minute")
+os.environ.setdefault("RATE_LIMIT_PER_USER", "100000000/minute")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+if "--response-cache" not in sys.argv:
+    os.environ.setdefault("RESPONSE_CACHE_TTL_SECONDS", "0")
+
+from app.api.pagination import encode_cursor  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.db.session import engine  # noqa: E402
+from app.main import create_app  # noqa: E402
+from app.security.auth import CurrentUser, get_current_user  # noqa: E402
+from bench.local_db import require_local_db  # noqa: E402
+from bench.seed import ATTRIBUTES, WORDS  # noqa: E402
+
+EMPRESA_ID = 1
+SCENARIOS = ["list", "get", "search", "create", "update"]
+WRITE_SCENARIOS = {"create", "update"}
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def create_bench_app():
+    app = create_app()
+    app.dependency_overrides[get_current_user] = lambda: CurrentUser(
+        sub="bench", claims={"app_metadata": {"empresa_id": EMPRESA_ID}}
+    )
+    return app
+
+
+class Catalog:
+    """Ids reales de la empresa del benchmark para armar los requests."""
+
+    def __init__(self, product_ids, supplier_id, unit_id, category_ids, total, server_version):
+        self.product_ids = product_ids
+        self.supplier_id = supplier_id
+        self.unit_id = unit_id
+        self.category_ids = category_ids
+        self.total = total
+        self.server_version = server_version
+
+    @classmethod
+    async def load(cls, sample: int) -> "Catalog":
+        async with engine.connect() as conn:
+            params = {"empresa": EMPRESA_ID, "sample": sample}
+            product_ids = (
+                await conn.execute(
+                    text(
+                        "select id_producto from productos "
+                        "where empresas_id_empresa = :empresa and estado "
+                        "order by random() limit :sample"
+                    ),
+                    params,
+                )
+            ).scalars().all()
+            supplier_id = (
+                await conn.execute(
+                    text("select min(id_proveedor) from proveedores where empresas_id_emp = :empresa"),
+                    params,
+                )
+            ).scalar_one()
+            unit_id = (await conn.execute(text("select min(id_unidad) from unidades_medida"))).scalar_one()
+            category_ids = (
+                await conn.execute(text("select id_categoria from categorias order by id_categoria limit 20"))
+            ).scalars().all()
+            total = (await conn.execute(text("select count(*) from productos"))).scalar_one()
+            server_version = (await conn.execute(text("show server_version"))).scalar_one()
+        await engine.dispose()
+        if not product_ids or supplier_id is None or unit_id is None:
+            sys.exit(f"Catálogo vacío para la empresa {EMPRESA_ID}: correr antes python -m bench.seed")
+        return cls(list(product_ids), supplier_id, unit_id, list(category_ids), total, server_version)
+
+
+async def delete_created() -> int:
+    # borrado físico (el DELETE de la API es lógico): atributos, pivot y
+    # outbox (si la migración 004 está aplicada) antes que el producto
+    created = "select id_producto from productos where codigo_sku like 'bench-load-%'"
+    async with engine.begin() as conn:
+        await conn.execute(text(f"delete from productos_atributos where productos_id_prod in ({created})"))
+        await conn.execute(text(f"delete from categorias_productos where productos_producto in ({created})"))
+        if (await conn.execute(text("select to_regclass('productos_outbox')"))).scalar_one():
+            await conn.execute(text(f"delete from productos_outbox where productos_id_prod in ({created})"))
+        removed = (await conn.execute(text("delete from productos where codigo_sku like 'bench-load-%'"))).rowcount
+    await engine.dispose()
+    return removed
+
+
+def build_request(scenario: str, catalog: Catalog, args) -> tuple[str, str, dict | None, dict | None]:
+    api = settings.API_V1_STR
+    if scenario == "list":
+        # página por cursor desde un punto al azar: keyset, como un cliente real
+        cursor = encode_cursor("id", [random.choice(catalog.product_ids)])
+        return "GET", f"{api}/products", {"limit": args.page_size, "cursor": cursor}, None
+    if scenario == "get":
+        return "GET", f"{api}/products/{random.choice(catalog.product_ids)}", None, None
+    if scenario == "search":
+        params = {"search": random.choice(WORDS), "limit": args.page_size}
+        if args.search_mode:
+            params["search_mode"] = args.search_mode
+        return "GET", f"{api}/products", params, None
+    if scenario == "create":
+        tag = uuid.uuid4().hex[:12]
+        body = {
+            "codigo_sku": f"bench-load-{tag}",
+            "nombre": f"{random.choice(WORDS)} {tag[:8]}",
+            "descripcion": "Producto creado por bench.load",
+            "precio": round(random.uniform(10, 5000), 2),
+            "proveedores_id_proveedor": catalog.supplier_id,
+            "unidades_medida_id_unidad": catalog.unit_id,
+            "empresas_id_empresa": EMPRESA_ID,
+            "categorias_ids": random.sample(catalog.category_ids, min(2, len(catalog.category_ids))),
+            "atributos": [
+                {"nombre_atributo": name, "valor": random.choice(values)}
+                for name, values in ATTRIBUTES[:3]
+            ],
+        }
+        return "POST", f"{api}/products", None, body
+    if scenario == "update":
+        body = {"precio": round(random.uniform(10, 5000), 2)}
+        return "PATCH", f"{api}/products/{random.choice(catalog.product_ids)}", None, body
+    raise ValueError(scenario)
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: str, catalog: Catalog, args) -> dict:
+    latencies: list[float] = []
+    errors: dict[str, int] = {}
+    measuring = False
+
+    async def worker(deadline: float) -> None:
+        while time.perf_counter() < deadline:
+            method, url, params, body = build_request(scenario, catalog, args)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, params=params, json=body)
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - started
+            if not measuring:
+                continue
+            if isinstance(status, int) and status < 400:
+                latencies.append(elapsed)
+            else:
+                errors[str(status)] = errors.get(str(status), 0) + 1
+
+    if args.warmup > 0:
+        deadline = time.perf_counter() + args.warmup
+        await asyncio.gather(*(worker(deadline) for _ in range(args.concurrency)))
+
+    measuring = True
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(*(worker(deadline) for _ in range(args.concurrency)))
+    wall = time.perf_counter() - started
+
+    result = {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall, 2),
+    }
+    if len(latencies) >= 2:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        result["latency_ms"] = {
+            "mean": round(statistics.fmean(latencies) * 1000, 3),
+            "p50": round(cuts[49] * 1000, 3),
+            "p95": round(cuts[94] * 1000, 3),
+            "p99": round(cuts[98] * 1000, 3),
+            "max": round(max(latencies) * 1000, 3),
+        }
+    return result
+
+
+def git_commit() -> str | None:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout
+        return commit + ("-dirty" if dirty.strip() else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(results: dict, baseline: dict | None) -> None:
+    print(f"\n{'escenario':<10} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errores':>8}")
+    for name, r in results["scenarios"].items():
+        lat = r.get("latency_ms", {})
+        print(
+            f"{name:<10} {r['throughput_rps']:>10.1f} {lat.get('p50', 0):>9.2f} "
+            f"{lat.get('p95', 0):>9.2f} {lat.get('p99', 0):>9.2f} {sum(r['errors'].values()):>8}"
+        )
+        base = (baseline or {}).get("scenarios", {}).get(name)
+        if base and base.get("throughput_rps") and base.get("latency_ms") and lat:
+
+            def delta(new, old):
+                return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+            print(
+                f"{'  vs base':<10} {delta(r['throughput_rps'], base['throughput_rps']):>10} "
+                f"{delta(lat['p50'], base['latency_ms']['p50']):>9} "
+                f"{delta(lat['p95'], base['latency_ms']['p95']):>9} "
+                f"{delta(lat['p99'], base['latency_ms']['p99']):>9}"
+            )
+
+
+async def main(args) -> int:
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        sys.exit(f"Escenarios desconocidos: {', '.join(sorted(unknown))}")
+    if WRITE_SCENARIOS.intersection(scenarios):
+        require_local_db(args.allow_remote, "create/update escriben y borran filas")
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+
+    random.seed(args.seed)
+    catalog = await Catalog.load(args.sample)
+    print(f"catálogo: {catalog.total} productos, muestra de {len(catalog.product_ids)} ids (empresa {EMPRESA_ID})")
+
+    if args.url:
+        transport = httpx.AsyncHTTPTransport(limits=httpx.Limits(max_connections=args.concurrency))
+        base_url = args.url
+    else:
+        transport = httpx.ASGITransport(app=create_bench_app())
+        base_url = "http://bench"
+
+    results = {
+        "meta": {
+            "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "target": args.url or "in-process",
+            "catalogo_productos": catalog.total,
+            "postgres": catalog.server_version,
+            "python": platform.python_version(),
+            "search_mode": args.search_mode or settings.PRODUCT_SEARCH_MODE,
+            "response_cache_ttl": settings.RESPONSE_CACHE_TTL_SECONDS,
+            "args": vars(args),
+        },
+        "scenarios": {},
+    }
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=30) as client:
+        for scenario in scenarios:
+            print(f"  {scenario}...")
+            results["scenarios"][scenario] = await run_scenario(client, scenario, catalog, args)
+
+    # primero las mediciones: si la limpieza falla no se pierden
+    out = Path(args.out) if args.out else RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+    if "create" in scenarios and not args.keep_created:
+        results["meta"]["creados_borrados"] = await delete_created()
+        out.write_text(json.dumps(results, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+    print_report(results, baseline)
+    print(f"\nresultados: {out}")
+    failed = [name for name, r in results["scenarios"].items() if r["errors"]]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--duration", type=float, default=10.0, help="segundos medidos por escenario")
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--search-mode", choices=["ilike", "fulltext"])
+    parser.add_argument("--sample", type=int, default=10_000, help="ids de productos a muestrear")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--url", help="servidor ya levantado (uvicorn bench.load:create_bench_app --factory)")
+    parser.add_argument("--response-cache", action="store_true", help="no desactivar la caché de respuestas")
+    parser.add_argument("--keep-created", action="store_true", help="no borrar los productos del escenario create")
+    parser.add_argument("--allow-remote", action="store_true", help="create/update contra una BD no local")
+    parser.add_argument("--out")
+    parser.add_argument("--baseline")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,14 @@
+"""Guarda común de los scripts de bench que escriben en la BD."""
+import sys
+from urllib.parse import urlparse
+
+from app.core.config import settings
+
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+
+def require_local_db(allow_remote: bool, action: str) -> None:
+    # los scripts crean tablas y dejan filas: nunca contra una BD compartida por error
+    host = urlparse(settings.DATABASE_URL).hostname
+    if host not in LOCAL_HOSTS and not allow_remote:
+        sys.exit(f"{action}: {host} no es local (usar --allow-remote si es a propósito)")
@@ -0,0 +1,138 @@
+"""Micro-benchmark: costo por request del stack de middlewares en /health.
+
+Compara la app sin middlewares, el stack anterior de tres
+``BaseHTTPMiddleware`` y el ``MiddlewarePipeline`` ASGI puro actual.
+
+    python -m bench.middleware_overhead --requests 5000
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+import uuid
+
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+from loguru import logger
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.middleware import (  # noqa: E402
+    MiddlewarePipeline,
+    RequestIdStage,
+    MetricsStage,
+    LoggingStage,
+    RateLimitStage,
+)
+
+
+# ---- stack anterior (copia de app/core/middleware.py antes del cambio) ----
+
+_legacy_counter: dict[str, int] = {}
+
+
+class LegacyRequestIdMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        request_id = str(uuid.uuid4())
+        request.state.request_id = request_id
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = request_id
+        return response
+
+
+class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        start = time.perf_counter()
+        response = await call_next(request)
+        duration = (time.perf_counter() - start) * 1000
+        print(f"{request.method} {request.url.path} -> {response.status_code} [{duration:.2f} ms]")
+        return response
+
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        ip = request.client.host if request.client else "unknown"
+        _legacy_counter[ip] = _legacy_counter.get(ip, 0) + 1
+        if _legacy_counter[ip] > 10**12:
+            return JSONResponse(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                content={"detail": "Too many requests"},
+            )
+        return await call_next(request)
+
+
+# ---------------------------------------------------------------------------
+
+
+def _base_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health():
+        return {"ok": True}
+
+    return app
+
+
+def build_apps() -> dict[str, FastAPI]:
+    bare = _base_app()
+
+    legacy = _base_app()
+    legacy.add_middleware(LegacyRequestIdMiddleware)
+    legacy.add_middleware(LegacyLoggingMiddleware)
+    legacy.add_middleware(LegacyRateLimitMiddleware)
+
+    pipeline = _base_app()
+    pipeline.add_middleware(
+        MiddlewarePipeline,
+        # límite alto: el real (300/min) cortaría el benchmark
+        stages=[
+            RequestIdStage(),
+            MetricsStage(),
+            LoggingStage(),
+            RateLimitStage(per_ip="1000000000/second"),
+        ],
+    )
+    return {"sin middlewares": bare, "BaseHTTPMiddleware x3": legacy, "ASGI pipeline": pipeline}
+
+
+async def measure(app: FastAPI, requests: int, rounds: int) -> float:
+    transport = httpx.ASGITransport(app=app, client=("10.0.0.1", 1234))
+    samples = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(200):  # warm-up
+            await client.get("/health")
+        for _ in range(rounds):
+            start = time.perf_counter()
+            for _ in range(requests):
+                await client.get("/health")
+            samples.append((time.perf_counter() - start) / requests * 1e6)
+    return statistics.median(samples)
+
+
+async def main(requests: int, rounds: int) -> None:
+    # los logs se descartan en ambos stacks (print / loguru)
+    logger.remove()
+    results = {}
+    for name, app in build_apps().items():
+        with contextlib.redirect_stdout(io.StringIO()):
+            results[name] = await measure(app, requests, rounds)
+
+    bare = results["sin middlewares"]
+    print(f"{'stack':<24}{'µs/request':>12}{'overhead µs':>14}")
+    for name, value in results.items():
+        print(f"{name:<24}{value:>12.1f}{value - bare:>14.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.rounds))
@@ -0,0 +1,147 @@
+"""Micro-benchmark: CPU por request de serializar una página de GET /products.
+
+Sin BD: las filas y las relaciones se arman en memoria con la misma forma que
+devuelven las queries. Compara el camino anterior (``ProductoRead(...)``
+validado + ``response_model`` de FastAPI + ``JSONResponse``) con el actual
+(``model_construct`` + ``TypeAdapter.dump_json`` directo a bytes).
+
+    python -m bench.serialization --items 100 --requests 300
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+import httpx
+from fastapi import FastAPI, Response
+from pydantic import TypeAdapter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.schemas.product_schemas import (  # noqa: E402
+    CategoriaRead,
+    ProductoAtributoRead,
+    ProductoRead,
+    ProveedorRead,
+    UnidadMedidaRead,
+)
+from app.services.product_reader import (  # noqa: E402
+    PRODUCT_COLUMNS,
+    assemble_product_reads,
+)
+
+
+def build_page(items: int, categories: int, attributes: int):
+    proveedores = {
+        1: ProveedorRead(id_proveedor=1, nombre="Proveedor", email="ventas@example.com")
+    }
+    unidades = {1: UnidadMedidaRead(id_unidad=1, codigo="UN", descripcion="Unidad")}
+    categorias = {
+        i: CategoriaRead(id_categoria=i, nombre=f"Categoria {i}", descripcion="desc")
+        for i in range(1, categories + 1)
+    }
+
+    rows, links, attrs = [], {}, {}
+    for i in range(1, items + 1):
+        rows.append(
+            SimpleNamespace(
+                id_producto=i,
+                codigo_sku=f"SKU-{i:06d}",
+                codigo_barra=f"779{i:010d}",
+                nombre=f"Producto {i}",
+                descripcion="Descripción de prueba " * 4,
+                stock_minimo_global=5,
+                estado=True,
+                fecha_creacion=datetime(2024, 1, 1, 12, 0, 0),
+                precio=Decimal("1234.50"),
+                proveedores_id_proveedor=1,
+                unidades_medida_id_unidad=1,
+                empresas_id_empresa=1,
+            )
+        )
+        links[i] = list(categorias)
+        attrs[i] = [
+            ProductoAtributoRead.model_construct(
+                id_atributo=i * 100 + a, nombre_atributo=f"attr{a}", valor=f"valor {a}"
+            )
+            for a in range(attributes)
+        ]
+    return rows, links, attrs, proveedores, unidades, categorias
+
+
+def build_apps(page) -> dict[str, FastAPI]:
+    rows, links, attrs, proveedores, unidades, categorias = page
+
+    # ---- camino anterior: validación completa + response_model + JSONResponse ----
+    legacy = FastAPI()
+
+    @legacy.get("/products", response_model=list[ProductoRead])
+    async def legacy_list():
+        return [
+            ProductoRead(
+                **{col: getattr(p, col) for col in PRODUCT_COLUMNS},
+                proveedor=proveedores.get(p.proveedores_id_proveedor),
+                unidad_medida=unidades.get(p.unidades_medida_id_unidad),
+                categorias=[categorias[c] for c in links.get(p.id_producto, [])],
+                atributos=[
+                    ProductoAtributoRead(**a.model_dump()) for a in attrs.get(p.id_producto, [])
+                ],
+            )
+            for p in rows
+        ]
+
+    # ---- camino actual: model_construct + TypeAdapter a bytes ----
+    current = FastAPI()
+    adapter = TypeAdapter(list[ProductoRead])
+
+    @current.get("/products", response_model=list[ProductoRead])
+    async def current_list():
+        reads = assemble_product_reads(rows, links, attrs, proveedores, unidades, categorias)
+        return Response(adapter.dump_json(reads), media_type="application/json")
+
+    return {"response_model (antes)": legacy, "TypeAdapter (ahora)": current}
+
+
+async def measure(app: FastAPI, requests: int, rounds: int) -> tuple[float, float, int]:
+    transport = httpx.ASGITransport(app=app)
+    cpu, wall = [], []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        body = (await client.get("/products")).content
+        for _ in range(20):  # warm-up
+            await client.get("/products")
+        for _ in range(rounds):
+            cpu_start, wall_start = time.process_time(), time.perf_counter()
+            for _ in range(requests):
+                await client.get("/products")
+            cpu.append((time.process_time() - cpu_start) / requests * 1e3)
+            wall.append((time.perf_counter() - wall_start) / requests * 1e3)
+    return statistics.median(cpu), statistics.median(wall), len(body)
+
+
+async def main(args) -> None:
+    page = build_page(args.items, args.categories, args.attributes)
+    apps = build_apps(page)
+
+    bodies = set()
+    print(f"{'camino':<26}{'CPU ms/req':>12}{'ms/req':>10}{'bytes':>10}")
+    for name, app in apps.items():
+        cpu, wall, size = await measure(app, args.requests, args.rounds)
+        bodies.add(size)
+        print(f"{name:<26}{cpu:>12.2f}{wall:>10.2f}{size:>10}")
+    if len(bodies) > 1:
+        print("¡atención! los cuerpos difieren en tamaño")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--categories", type=int, default=3)
+    parser.add_argument("--attributes", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,130 @@
+"""Cuenta las sentencias SQL que ejecutan create_product y update_product.
+
+No hay suite de tests en el repo: este script hace de chequeo y falla
+(exit 1) si alguna escritura supera su presupuesto de idas a la BD. Usa
+la app real contra la BD de ``DATABASE_URL`` (una BD descartable: crea
+tablas si faltan y deja filas con SKU ``bench-*``), con la auth reemplazada.
+Solo corre contra hosts locales salvo ``--allow-remote``.
+
+    DATABASE_URL=postgresql://postgres@localhost:5432/bench python -m bench.write_round_trips
+"""
+import argparse
+import asyncio
+import os
+import sys
+import uuid
+
+import httpx
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.session import engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.product_models import Base  # noqa: E402
+from app.security.auth import CurrentUser, get_current_user  # noqa: E402
+from bench.local_db import require_local_db  # noqa: E402
+
+# sentencias por operación con las cachés de referencia calientes
+BUDGET = {
+    # INSERT producto + INSERT atributos + INSERT pivot
+    "create (categorías + atributos)": 3,
+    # UPDATE ... RETURNING + pivot y atributos actuales para la respuesta
+    "update (solo precio)": 3,
+    # UPDATE + DELETE/INSERT pivot + atributos actuales y su diferencia
+    "update (categorías + atributos)": 6,
+    # atributos iguales: se leen y no se escribe nada (+ pivot para la respuesta)
+    "update (atributos sin cambios)": 3,
+}
+
+
+class StatementCounter:
+    def __init__(self):
+        self.statements: list[str] = []
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement.split("\n", 1)[0][:80])
+
+    def reset(self) -> None:
+        self.statements = []
+
+
+async def main() -> int:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    app.dependency_overrides[get_current_user] = lambda: CurrentUser(
+        sub="bench", claims={"app_metadata": {"empresa_id": 1}}
+    )
+    counter = StatementCounter()
+    tag = uuid.uuid4().hex[:8]
+    api = "/api/v1"
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        supplier = (await client.post(f"{api}/suppliers", json={"nombre": "bench", "empresas_id_emp": 1})).json()
+        unit = (await client.post(f"{api}/units", json={"codigo": "bench"})).json()
+        categories = [
+            (await client.post(f"{api}/categories", json={"nombre": f"bench {i}"})).json()["id_categoria"]
+            for i in range(2)
+        ]
+        product = {
+            "nombre": "bench",
+            "precio": 10,
+            "proveedores_id_proveedor": supplier["id_proveedor"],
+            "unidades_medida_id_unidad": unit["id_unidad"],
+            "empresas_id_empresa": 1,
+            "categorias_ids": categories,
+            "atributos": [{"nombre_atributo": "Color", "valor": "Negro"}, {"nombre_atributo": "RAM"}],
+        }
+        # calienta las cachés de referencia (proveedor, unidad, categorías)
+        warm = await client.post(f"{api}/products", json={**product, "codigo_sku": f"bench-{tag}-0"})
+        assert warm.status_code == 201, warm.text
+
+        async def run(name: str, method: str, url: str, body: dict) -> tuple[str, int, int]:
+            counter.reset()
+            response = await client.request(method, url, json=body)
+            assert response.status_code < 300, response.text
+            return name, len(counter.statements), response.json()["id_producto"]
+
+        results = []
+        name, count, product_id = await run(
+            "create (categorías + atributos)", "POST", f"{api}/products",
+            {**product, "codigo_sku": f"bench-{tag}-1"},
+        )
+        results.append((name, count, list(counter.statements)))
+        name, count, _ = await run(
+            "update (solo precio)", "PATCH", f"{api}/products/{product_id}", {"precio": 11}
+        )
+        results.append((name, count, list(counter.statements)))
+        name, count, _ = await run(
+            "update (categorías + atributos)", "PATCH", f"{api}/products/{product_id}",
+            {"categorias_ids": categories[:1], "atributos": [{"nombre_atributo": "Talla", "valor": "M"}]},
+        )
+        results.append((name, count, list(counter.statements)))
+        name, count, _ = await run(
+            "update (atributos sin cambios)", "PATCH", f"{api}/products/{product_id}",
+            {"atributos": [{"nombre_atributo": "Talla", "valor": "M"}]},
+        )
+        results.append((name, count, list(counter.statements)))
+
+    failed = False
+    for name, count, statements in results:
+        budget = BUDGET[name]
+        ok = count <= budget
+        failed |= not ok
+        print(f"{'OK ' if ok else 'FAIL'} {name:<34} {count} sentencias (máx. {budget})")
+        for statement in statements:
+            print(f"       {statement}")
+
+    await engine.dispose()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--allow-remote", action="store_true", help="crea tablas y deja filas bench-*")
+    args = parser.parse_args()
+    require_local_db(args.allow_remote, "write_round_trips crea tablas y filas")
+    sys.exit(asyncio.run(main()))
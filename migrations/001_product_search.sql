@@ -0,0 +1,26 @@
+-- Búsqueda indexada de productos (PRODUCT_SEARCH_MODE=fulltext)
+--
+-- En tablas grandes conviene crear los índices con CREATE INDEX CONCURRENTLY
+-- (fuera de una transacción) para no bloquear escrituras.
+
+create extension if not exists pg_trgm;
+
+-- tsvector mantenido por Postgres; la configuración 'simple' evita stemming
+-- para que los prefijos (laptop:*) coincidan tal cual se escriben
+alter table productos
+    add column if not exists search_vector tsvector
+    generated always as (
+        setweight(to_tsvector('simple', coalesce(codigo_sku, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(nombre, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(descripcion, '')), 'B')
+    ) stored;
+
+create index if not exists ix_productos_search_vector
+    on productos using gin (search_vector);
+
+-- trigramas: similitud en nombre y ILIKE '%...%' indexado en códigos
+create index if not exists ix_productos_nombre_trgm
+    on productos using gin (nombre gin_trgm_ops);
+
+create index if not exists ix_productos_codigo_sku_trgm
+    on productos using gin (codigo_sku gin_trgm_ops);
@@ -0,0 +1,12 @@
+-- Filtros de productos por atributo (attr.<nombre>=<valor> en GET /products)
+--
+-- En tablas grandes conviene crear los índices con CREATE INDEX CONCURRENTLY
+-- (fuera de una transacción) para no bloquear escrituras.
+
+-- (nombre, valor) -> productos sin tocar la tabla: index-only scan por filtro
+create index if not exists ix_productos_atributos_nombre_valor_prod
+    on productos_atributos (nombre_atributo, valor, productos_id_prod);
+
+-- atributos de un producto (respuestas, reemplazo de atributos)
+create index if not exists ix_productos_atributos_prod
+    on productos_atributos (productos_id_prod);
@@ -0,0 +1,94 @@
+-- Feed de cambios de productos (GET /products/changes)
+--
+-- version = id de la transacción que escribió la fila (xid8 como bigint).
+-- Crece con el tiempo y, a diferencia de una secuencia, permite saber qué
+-- transacciones ya no pueden hacer commit "por detrás": el feed solo devuelve
+-- versiones menores a pg_snapshot_xmin(pg_current_snapshot()), así un
+-- consumidor nunca se salta una transacción larga que confirma más tarde.
+--
+-- Requiere Postgres 13+. En tablas grandes, agregar las columnas con default
+-- volátil reescribe la tabla: conviene hacerlo en una ventana de mantenimiento.
+
+alter table productos
+    add column if not exists version bigint not null default pg_current_xact_id()::text::bigint,
+    add column if not exists updated_at timestamptz not null default now();
+
+alter table productos_atributos
+    add column if not exists version bigint not null default pg_current_xact_id()::text::bigint,
+    add column if not exists updated_at timestamptz not null default now();
+
+-- keyset del feed: (version, id)
+create index if not exists ix_productos_version
+    on productos (version, id_producto);
+
+create or replace function catalog_touch_row() returns trigger
+language plpgsql as $$
+begin
+    new.version := pg_current_xact_id()::text::bigint;
+    new.updated_at := now();
+    return new;
+end;
+$$;
+
+drop trigger if exists productos_touch on productos;
+create trigger productos_touch
+    before update on productos
+    for each row execute function catalog_touch_row();
+
+drop trigger if exists productos_atributos_touch on productos_atributos;
+create trigger productos_atributos_touch
+    before update on productos_atributos
+    for each row execute function catalog_touch_row();
+
+-- atributos y categorías cambian la versión del producto. Triggers por
+-- sentencia con tabla de transición: un solo UPDATE por INSERT/COPY masivo, y
+-- sin volver a tocar productos ya versionados en esta misma transacción.
+create or replace function productos_atributos_touch_product() returns trigger
+language plpgsql as $$
+begin
+    update productos p set updated_at = now()
+    where p.id_producto in (select productos_id_prod from changed_rows)
+      and p.version <> pg_current_xact_id()::text::bigint;
+    return null;
+end;
+$$;
+
+create or replace function categorias_productos_touch_product() returns trigger
+language plpgsql as $$
+begin
+    update productos p set updated_at = now()
+    where p.id_producto in (select productos_producto from changed_rows)
+      and p.version <> pg_current_xact_id()::text::bigint;
+    return null;
+end;
+$$;
+
+drop trigger if exists productos_atributos_insert_touch on productos_atributos;
+create trigger productos_atributos_insert_touch
+    after insert on productos_atributos
+    referencing new table as changed_rows
+    for each statement execute function productos_atributos_touch_product();
+
+drop trigger if exists productos_atributos_update_touch on productos_atributos;
+create trigger productos_atributos_update_touch
+    after update on productos_atributos
+    referencing new table as changed_rows
+    for each statement execute function productos_atributos_touch_product();
+
+drop trigger if exists productos_atributos_delete_touch on productos_atributos;
+create trigger productos_atributos_delete_touch
+    after delete on productos_atributos
+    referencing old table as changed_rows
+    for each statement execute function productos_atributos_touch_product();
+
+drop trigger if exists categorias_productos_insert_touch on categorias_productos;
+create trigger categorias_productos_insert_touch
+    after insert on categorias_productos
+    referencing new table as changed_rows
+    for each statement execute function categorias_productos_touch_product();
+
+drop trigger if exists categorias_productos_delete_touch on categorias_productos;
+create trigger categorias_productos_delete_touch
+    after delete on categorias_productos
+    referencing old table as changed_rows
+    for each statement execute function categorias_productos_touch_product();
@@ -0,0 +1,21 @@
+-- Outbox transaccional de eventos de productos (OUTBOX_ENABLED=true)
+--
+-- Las escrituras de productos insertan aquí un evento en la misma
+-- transacción; el dispatcher del servicio los publica en lotes.
+
+create table if not exists productos_outbox (
+    id_evento bigserial primary key,
+    -- sin FK: el evento no depende de que el producto siga existiendo
+    productos_id_prod integer not null,
+    tipo varchar(20) not null,
+    fecha_creacion timestamptz not null default now(),
+    intentos integer not null default 0,
+    proximo_intento timestamptz not null default now(),
+    fecha_publicacion timestamptz,
+    ultimo_error varchar(500)
+);
+
+-- solo los pendientes: el índice no crece con el histórico publicado
+create index if not exists ix_productos_outbox_pendientes
+    on productos_outbox (proximo_intento, id_evento)
+    where fecha_publicacion is null;
@@ -0,0 +1,27 @@
+-- Índices por empresa (multi-tenant): cada query se acota a
+-- empresas_id_empresa / empresas_id_emp, así que la columna va primero y el
+-- costo depende del catálogo de una empresa, no del total de la plataforma.
+--
+-- En tablas grandes conviene crear los índices con CREATE INDEX CONCURRENTLY
+-- (fuera de una transacción) para no bloquear escrituras.
+
+-- GET /products: empresa + estado, orden por id (paginación keyset)
+create index if not exists ix_productos_empresa_estado_id
+    on productos (empresas_id_empresa, estado, id_producto);
+
+-- GET /suppliers
+create index if not exists ix_proveedores_empresa_estado_id
+    on proveedores (empresas_id_emp, estado, id_proveedor);
+
+-- GET /products/changes por empresa (solo si migrations/003 está aplicada)
+do $$
+begin
+    if exists (
+        select 1 from information_schema.columns
+        where table_name = 'productos' and column_name = 'version'
+    ) then
+        create index if not exists ix_productos_empresa_version
+            on productos (empresas_id_empresa, version, id_producto);
+    end if;
+end;
+$$;
@@ -0,0 +1,8 @@
+-- Categorías de un producto: la PK de categorias_productos empieza por
+-- categoría, así que buscar por producto (respuestas, ETag) recorría la tabla.
+--
+-- En tablas grandes conviene crearlo con CREATE INDEX CONCURRENTLY
+-- (fuera de una transacción) para no bloquear escrituras.
+
+create index if not exists ix_categorias_productos_producto
+    on categorias_productos (productos_producto, categorias_categoria);